@@ -42,20 +42,42 @@ import numpy as np
 from torchvision.transforms import transforms
 from tqdm import tqdm
 
+import argparse
+import asyncio
+from enum import Enum
 import concurrent.futures
-from queue import Queue
+from concurrent.futures.process import BrokenProcessPool
+from queue import Queue, Empty
 from threading import Lock
 import threading
 from dataclasses import dataclass, field
-from typing import Dict, Set
+from typing import Dict, Set, Iterator, Union, Callable, Iterable
 import time
+import xml.etree.ElementTree as ET
 
 import hashlib
+import heapq
+from collections import OrderedDict
+import math
+import multiprocessing
+import struct
 import mimetypes
+import re
 from urllib.parse import urlparse
 import requests
 import urllib.parse
 from requests.exceptions import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
 from PIL import Image
 
 """
@@ -1209,8 +1231,8 @@ class ScraperConfig:
     """Configuration settings for the scraper"""
     base_save_path: Path
     request_timeout: int = 30
-    page_delay: float = 2.0
-    download_delay: float = 1.0
+    page_delay: float = 2.0  # Seconds per list request to a host, shared by all threads
+    download_delay: float = 1.0  # Seconds per file request to a host, shared by all threads
     retry_attempts: int = 3
     chunk_size: int = 8192
     headless: bool = True
@@ -1218,8 +1240,56 @@ class ScraperConfig:
     filename_length: int = 8
     max_file_size: int = 50 * 1024 * 1024
     nsfw_threshold: float = 0.5
+    inference_batch_size: int = 16  # Images per model forward pass
+    inference_batch_wait_ms: int = 20  # Longest the first queued image waits for a batch to fill
+    inference_processes: int = 0  # Run NSFW detection in this many worker processes, 0 for in-process
+    inference_backend: str = "keras"  # "keras" (TensorFlow) or "onnx" (onnxruntime)
+    onnx_model_path: str = "models/open_nsfw.onnx"  # Exported from the Keras weights on first use
+    onnx_quantized: bool = False  # Use the INT8 dynamically quantized ONNX model
+    onnx_intra_op_threads: int = 0  # Threads per operator, 0 for onnxruntime's default
+    onnx_inter_op_threads: int = 1  # Operators run in parallel; the graph is sequential
+    score_cache_size: int = 100_000  # Classification results kept in memory in front of the database
+    use_rating_policy: bool = True  # Trust booru ratings for clear-cut posts instead of running the model
+    rating_accept: List[str] = field(default_factory=lambda: ['explicit'])  # Kept without inference
+    rating_reject: List[str] = field(default_factory=lambda: ['general'])  # Dropped before download
+    preview_classification: bool = True  # Classify a post's small rendition before fetching the original
+    preview_source: str = "preview"  # Rendition tried first: "preview" (thumbnail) or "sample"
     debug: bool = False
     verbose_logging: bool = False
+    listing_mode: str = "api"  # "api" for booru JSON/XML APIs, "browser" for Selenium page walks
+    api_page_limit: Optional[int] = None  # Posts per API request, defaults to the site maximum
+    gelbooru_api_key: Optional[str] = None
+    gelbooru_user_id: Optional[str] = None
+    danbooru_login: Optional[str] = None
+    danbooru_api_key: Optional[str] = None
+    browser_pool_size: int = 4
+    browser_max_navigations: int = 500  # Recycle a pooled browser after this many page loads
+    browser_max_rss_mb: float = 2048.0  # Recycle a pooled browser above this resident memory
+    page_load_strategy: str = "eager"  # Selenium pageLoadStrategy: "normal", "eager" or "none"
+    dom_only_browsing: bool = True  # Allow sites whose profile opts in to block images/CSS/fonts/ads
+    measure_page_cost: bool = True  # Record bytes and DOMContentLoaded time for every page load
+    capture_network_urls: bool = False  # Harvest original image URLs from DevTools network events
+    http_pool_maxsize: Optional[int] = None  # Keep-alive connections per host; None sizes it from the worker limits
+    async_downloads: bool = True  # Download and classify on a separate asyncio stage instead of inline
+    download_queue_size: int = 256  # Jobs buffered between listing and downloading before listing blocks
+    download_concurrency: int = 8
+    per_host_download_concurrency: int = 4
+    classification_workers: int = 2
+    rate_limit_burst: int = 4  # Requests a host may receive back to back before delays apply
+    db_batch_size: int = 200  # Rows per SQLite transaction
+    db_flush_interval_ms: int = 500  # Longest a queued row waits before being committed
+    incremental: bool = True  # Stop listing a query at the newest post id a previous run completed
+    resume: bool = False  # Continue each character from its last checkpointed page
+    scheduling: str = "page"  # "page": workers share a queue of list pages, "character": one character per worker
+    list_workers: int = 4  # Threads listing pages
+    dispatch_priority: str = "fewest_files"  # Start order: "fewest_files" in the catalog first, or "fifo"
+    adaptive_workers: bool = True  # Resize listing, download and classification pools from live measurements
+    max_list_workers: int = 8  # Also capped at browser_pool_size
+    max_download_concurrency: int = 32
+    max_classification_workers: int = 4
+    cpu_limit_percent: float = 85.0  # Shrink pools above this system CPU use
+    rss_limit_mb: float = 8192.0  # Shrink pools above this RSS for the scraper and its browsers
+    adapt_interval: float = 10.0  # Seconds between pool size adjustments
 
     def __post_init__(self):
         """Validate and process configuration after initialization."""
@@ -1248,10 +1318,72 @@ class ScraperConfig:
             raise ValueError("chunk_size must be positive")
         if self.filename_length < 1:
             raise ValueError("filename_length must be at least 1")
+        if self.inference_batch_size < 1:
+            raise ValueError("inference_batch_size must be at least 1")
+        if self.inference_batch_wait_ms < 0:
+            raise ValueError("inference_batch_wait_ms must be non-negative")
+        if self.inference_processes < 0:
+            raise ValueError("inference_processes must be non-negative")
+        if self.preview_source not in ('preview', 'sample'):
+            raise ValueError("preview_source must be 'preview' or 'sample'")
+        if set(self.rating_accept) & set(self.rating_reject):
+            raise ValueError("rating_accept and rating_reject must not share ratings")
+        if self.inference_backend not in ('keras', 'onnx'):
+            raise ValueError("inference_backend must be 'keras' or 'onnx'")
+        if self.onnx_intra_op_threads < 0 or self.onnx_inter_op_threads < 0:
+            raise ValueError("onnx thread counts must be non-negative")
         # if not 0 <= self.nsfw_threshold <= 1:
         #     raise ValueError("nsfw_threshold must be between 0 and 1")
         if self.max_file_size <= 0:
             raise ValueError("max_file_size must be positive")
+        if self.listing_mode not in ('api', 'browser'):
+            raise ValueError("listing_mode must be 'api' or 'browser'")
+        if self.api_page_limit is not None and self.api_page_limit < 1:
+            raise ValueError("api_page_limit must be at least 1")
+        if self.download_queue_size < 1:
+            raise ValueError("download_queue_size must be at least 1")
+        if self.download_concurrency < 1 or self.per_host_download_concurrency < 1:
+            raise ValueError("download concurrency limits must be at least 1")
+        if self.classification_workers < 1:
+            raise ValueError("classification_workers must be at least 1")
+        if self.rate_limit_burst < 1:
+            raise ValueError("rate_limit_burst must be at least 1")
+        if self.scheduling not in ('page', 'character'):
+            raise ValueError("scheduling must be 'page' or 'character'")
+        if self.dispatch_priority not in ('fewest_files', 'fifo'):
+            raise ValueError("dispatch_priority must be 'fewest_files' or 'fifo'")
+        if self.list_workers < 1:
+            raise ValueError("list_workers must be at least 1")
+        if self.max_list_workers < self.list_workers:
+            raise ValueError("max_list_workers must be at least list_workers")
+        if self.max_download_concurrency < self.download_concurrency:
+            raise ValueError("max_download_concurrency must be at least download_concurrency")
+        if self.max_classification_workers < self.classification_workers:
+            raise ValueError("max_classification_workers must be at least classification_workers")
+        if self.adapt_interval <= 0:
+            raise ValueError("adapt_interval must be positive")
+        if self.db_batch_size < 1:
+            raise ValueError("db_batch_size must be at least 1")
+        if self.db_flush_interval_ms <= 0:
+            raise ValueError("db_flush_interval_ms must be positive")
+        if self.browser_pool_size < 1:
+            raise ValueError("browser_pool_size must be at least 1")
+        # API listings fall back to the browser walk, so any lister may need a pooled browser
+        if self.list_workers > self.browser_pool_size:
+            raise ValueError("list_workers must not exceed browser_pool_size")
+        if self.browser_max_navigations < 1:
+            raise ValueError("browser_max_navigations must be at least 1")
+        if self.page_load_strategy not in ('normal', 'eager', 'none'):
+            raise ValueError("page_load_strategy must be 'normal', 'eager' or 'none'")
+
+        # A host sees at most every lister (API host) or per_host_download_concurrency fetches (file host)
+        # at once; a smaller pool makes urllib3 discard connections and reconnect on every request
+        peak_listers = (min(self.max_list_workers, self.browser_pool_size) if self.adaptive_workers
+                        else self.list_workers)
+        if self.http_pool_maxsize is None:
+            self.http_pool_maxsize = max(self.per_host_download_concurrency, peak_listers)
+        if self.http_pool_maxsize < self.per_host_download_concurrency:
+            raise ValueError("http_pool_maxsize must be at least per_host_download_concurrency")
 
     def to_dict(self):
         """Convert config to dictionary for logging/debugging."""
@@ -1267,16 +1399,337 @@ class ScraperConfig:
             'filename_length': self.filename_length,
             'max_file_size': self.max_file_size,
             'nsfw_threshold': self.nsfw_threshold,
+            'inference_batch_size': self.inference_batch_size,
+            'inference_batch_wait_ms': self.inference_batch_wait_ms,
+            'inference_processes': self.inference_processes,
+            'inference_backend': self.inference_backend,
+            'onnx_model_path': self.onnx_model_path,
+            'onnx_quantized': self.onnx_quantized,
+            'onnx_intra_op_threads': self.onnx_intra_op_threads,
+            'onnx_inter_op_threads': self.onnx_inter_op_threads,
+            'score_cache_size': self.score_cache_size,
+            'use_rating_policy': self.use_rating_policy,
+            'rating_accept': self.rating_accept,
+            'rating_reject': self.rating_reject,
+            'preview_classification': self.preview_classification,
+            'preview_source': self.preview_source,
             'debug': self.debug,
-            'verbose_logging': self.verbose_logging
+            'verbose_logging': self.verbose_logging,
+            'listing_mode': self.listing_mode,
+            'api_page_limit': self.api_page_limit,
+            'browser_pool_size': self.browser_pool_size,
+            'browser_max_navigations': self.browser_max_navigations,
+            'browser_max_rss_mb': self.browser_max_rss_mb,
+            'page_load_strategy': self.page_load_strategy,
+            'dom_only_browsing': self.dom_only_browsing,
+            'measure_page_cost': self.measure_page_cost,
+            'capture_network_urls': self.capture_network_urls,
+            'http_pool_maxsize': self.http_pool_maxsize,
+            'async_downloads': self.async_downloads,
+            'download_queue_size': self.download_queue_size,
+            'download_concurrency': self.download_concurrency,
+            'per_host_download_concurrency': self.per_host_download_concurrency,
+            'classification_workers': self.classification_workers,
+            'rate_limit_burst': self.rate_limit_burst,
+            'db_batch_size': self.db_batch_size,
+            'db_flush_interval_ms': self.db_flush_interval_ms,
+            'incremental': self.incremental,
+            'resume': self.resume,
+            'scheduling': self.scheduling,
+            'list_workers': self.list_workers,
+            'dispatch_priority': self.dispatch_priority,
+            'adaptive_workers': self.adaptive_workers,
+            'max_list_workers': self.max_list_workers,
+            'max_download_concurrency': self.max_download_concurrency,
+            'max_classification_workers': self.max_classification_workers,
+            'cpu_limit_percent': self.cpu_limit_percent,
+            'rss_limit_mb': self.rss_limit_mb,
+            'adapt_interval': self.adapt_interval
         }
 
+    @property
+    def nsfw_model_version(self) -> str:
+        """Identifies the model producing scores, so cached scores from another model are ignored"""
+        if self.inference_backend == 'onnx':
+            return 'opennsfw2-onnx-int8' if self.onnx_quantized else 'opennsfw2-onnx'
+        return 'opennsfw2-keras'
+
+    @property
+    def listing_rate(self) -> Optional[float]:
+        """Allowed list/API requests per second per host, None for unlimited"""
+        return 1 / self.page_delay if self.page_delay else None
+
+    @property
+    def download_rate(self) -> Optional[float]:
+        """Allowed file requests per second per host, None for unlimited"""
+        return 1 / self.download_delay if self.download_delay else None
+
+
+class InferenceBackend(ABC):
+    """Runs the OpenNSFW2 network on a batch of Yahoo-preprocessed 224x224 BGR images"""
+
+    name = 'base'
+
+    @abstractmethod
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Return one (sfw, nsfw) probability row per image"""
+        pass
+
+
+class KerasBackend(InferenceBackend):
+    """The reference OpenNSFW2 Keras model on TensorFlow"""
+
+    name = 'keras'
+
+    def __init__(self):
+        # Model will be automatically downloaded if not present
+        self.model = n2.make_open_nsfw_model()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.model.predict(batch, batch_size=len(batch), verbose=0)
+
+
+class ONNXBackend(InferenceBackend):
+    """OpenNSFW2 exported to ONNX and run on onnxruntime's CPU provider"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path: Path, intra_op_threads: int = 0, inter_op_threads: int = 1):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the onnx inference backend")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads  # 0 lets onnxruntime use every physical core
+        options.inter_op_num_threads = inter_op_threads
+        self.model_path = Path(model_path)
+        self.session = ort.InferenceSession(str(self.model_path), sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+def export_onnx_model(output_path: Path, logger: logging.Logger = None) -> Path:
+    """
+    Export the OpenNSFW2 Keras weights to ONNX.
+
+    Needs TensorFlow and tf2onnx once at export time; inference afterwards only needs onnxruntime.
+    tf2onnx pins an older protobuf than the scraper's requirements, so install
+    requirements-export.txt in a separate environment for this step.
+    """
+    import tensorflow as tf
+    try:
+        import tf2onnx
+    except ImportError as e:
+        raise ImportError("tf2onnx is required to export the ONNX model, see requirements-export.txt") from e
+
+    logger = logger or logging.getLogger(__name__)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    model = n2.make_open_nsfw_model()
+    signature = (tf.TensorSpec((None, 224, 224, 3), tf.float32, name='input'),)
+
+    # Convert a traced forward pass; from_keras doesn't handle Keras 3 models
+    @tf.function(input_signature=signature)
+    def forward(images):
+        return model(images, training=False)
+
+    tf2onnx.convert.from_function(forward, input_signature=signature, opset=13, output_path=str(output_path))
+    logger.info(f"Exported OpenNSFW2 to {output_path}")
+    return output_path
+
+
+def quantize_onnx_model(model_path: Path, output_path: Path, logger: logging.Logger = None) -> Path:
+    """Write an INT8 dynamically quantized copy of an ONNX model; needs the onnx package from requirements-export.txt"""
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise ImportError("onnx and onnxruntime are required to quantize the model, see requirements-export.txt") from e
+
+    logger = logger or logging.getLogger(__name__)
+    quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8)
+    logger.info(f"Wrote INT8 quantized model to {output_path}")
+    return Path(output_path)
+
+
+def prepare_onnx_model(onnx_path: Optional[str] = None, quantized: bool = False,
+                       logger: logging.Logger = None) -> Path:
+    """Path of the ONNX model to load, exporting or quantizing it first if it doesn't exist yet"""
+    model_path = Path(onnx_path or 'models/open_nsfw.onnx')
+    if not model_path.exists():
+        export_onnx_model(model_path, logger=logger)
+    if quantized:
+        quantized_path = model_path.with_suffix('.int8.onnx')
+        if not quantized_path.exists():
+            quantize_onnx_model(model_path, quantized_path, logger=logger)
+        model_path = quantized_path
+    return model_path
+
+
+def create_inference_backend(backend: str = 'keras', onnx_path: Optional[str] = None, quantized: bool = False,
+                             intra_op_threads: int = 0, inter_op_threads: int = 1,
+                             logger: logging.Logger = None) -> InferenceBackend:
+    """Build the configured backend"""
+    if backend == 'keras':
+        return KerasBackend()
+    if backend != 'onnx':
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    model_path = prepare_onnx_model(onnx_path, quantized, logger=logger)
+    return ONNXBackend(model_path, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads)
+
+
+INFERENCE_BACKEND_CHOICES = ('keras', 'onnx', 'onnx-int8')
+
+
+def inference_backend_from_choice(choice: str, onnx_path: Optional[str] = None, intra_op_threads: int = 0,
+                                  logger: logging.Logger = None) -> InferenceBackend:
+    """Build a backend from one of INFERENCE_BACKEND_CHOICES"""
+    if choice == 'keras':
+        return create_inference_backend('keras', logger=logger)
+    return create_inference_backend('onnx', onnx_path=onnx_path, quantized=choice == 'onnx-int8',
+                                    intra_op_threads=intra_op_threads, logger=logger)
+
+
+def compare_inference_backends(reference: InferenceBackend, candidate: InferenceBackend, image_paths: List[Path],
+                               threshold: float = 0.5, batch_size: int = 16, rounds: int = 3) -> Dict[str, Any]:
+    """
+    Score the same images with two backends and report parity and throughput.
+
+    Parity is the largest and mean absolute difference in NSFW score plus how many keep/drop
+    decisions flip at threshold. Throughput is images per second over `rounds` passes after
+    one warm-up batch, with preprocessing excluded so only the backends are compared.
+    """
+    processed = []
+    for image_path in image_paths:
+        with Image.open(str(image_path)) as image:
+            processed.append(n2.preprocess_image(image, n2.Preprocessing.YAHOO))
+    if not processed:
+        raise ValueError("No images to compare backends on")
+    batches = [np.stack(processed[i:i + batch_size]) for i in range(0, len(processed), batch_size)]
+
+    # Keyed by role rather than backend name, which is the same for the fp32 and INT8 ONNX models
+    results = {'images': len(processed)}
+    scores = {}
+    for role, backend in (('reference', reference), ('candidate', candidate)):
+        backend.predict(batches[0])  # Warm-up: graph building, allocations
+        started = time.perf_counter()
+        for _ in range(rounds):
+            predictions = np.concatenate([backend.predict(batch) for batch in batches])
+        elapsed = time.perf_counter() - started
+        scores[role] = predictions[:, 1]
+        results[f'{role}_images_per_second'] = len(processed) * rounds / elapsed
+
+    diff = np.abs(scores['reference'] - scores['candidate'])
+    results['max_abs_diff'] = float(diff.max())
+    results['mean_abs_diff'] = float(diff.mean())
+    results['decision_flips'] = int(np.sum((scores['reference'] > threshold) != (scores['candidate'] > threshold)))
+    return results
+
+
+class InferenceBatcher:
+    """
+    Single inference thread that runs the model on batches gathered from every worker.
+
+    Callers preprocess on their own threads and submit one input array at a time, getting a
+    future back. The inference thread waits at most max_wait after the first queued input for
+    up to max_batch inputs, then runs one predict call for all of them, so concurrent workers
+    share forward passes instead of each running batch size 1 and contending for the
+    framework's intra-op thread pool.
+    """
+
+    _STOP = object()
+
+    def __init__(self, predict: Callable[[np.ndarray], np.ndarray], max_batch: int = 16, max_wait: float = 0.02,
+                 logger: logging.Logger = None):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._queue: Queue = Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'items': 0, 'batches': 0, 'largest_batch': 0, 'errors': 0, 'predict_seconds': 0.0}
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='nsfw-inference', daemon=True)
+            self._thread.start()
+
+    def submit(self, input_data: np.ndarray) -> concurrent.futures.Future:
+        """Queue one preprocessed input; the future resolves to its row of the model output"""
+        future = concurrent.futures.Future()
+        if self._thread is None:
+            future.set_exception(RuntimeError("Inference batcher is not running"))
+        else:
+            self._queue.put((input_data, future))
+        return future
+
+    def close(self) -> None:
+        """Finish queued inputs and stop the inference thread"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        self.logger.info(f"Inference batcher stats: {self.stats}")
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[np.ndarray, concurrent.futures.Future]]) -> None:
+        started = time.monotonic()
+        try:
+            predictions = self.predict(np.stack([input_data for input_data, _ in batch]))
+        except Exception as e:
+            self.stats['errors'] += len(batch)
+            self.logger.error(f"Inference failed for a batch of {len(batch)}: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.stats['items'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        self.stats['predict_seconds'] += time.monotonic() - started
+        for (_, future), prediction in zip(batch, predictions):
+            future.set_result(prediction)
+
 
 class NSFWDetector:
     """Handles NSFW content detection using OpenNSFW2"""
 
-    def __init__(self, threshold: float = 0.5):  # Increased default threshold for NSFW content
+    def __init__(self, threshold: float = 0.5,  # Increased default threshold for NSFW content
+                 batch_size: int = 16, batch_wait_ms: int = 20, backend: str = 'keras',
+                 backend_options: Dict[str, Any] = None):
         self.threshold = threshold
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.backend_name = backend
+        self.backend_options = backend_options or {}
         self._setup_logging()
         self._setup_model()
 
@@ -1295,50 +1748,40 @@ class NSFWDetector:
     def _setup_model(self):
         """Initialize the NSFW detection model"""
         try:
-            # Model will be automatically downloaded if not present
-            self.model = n2.make_open_nsfw_model()
-            self.logger.info("NSFW model loaded successfully")
+            self.backend = create_inference_backend(self.backend_name, logger=self.logger, **self.backend_options)
+            self.logger.info(f"NSFW model loaded successfully ({self.backend.name} backend)")
         except Exception as e:
             self.logger.error(f"Failed to initialize NSFW model: {str(e)}")
             raise
 
-    def _process_image(self, image: Image.Image) -> float:
-        """Process a single PIL Image and return NSFW score"""
-        try:
-            # Preprocess image using Yahoo's preprocessing
-            processed_image = n2.preprocess_image(image, n2.Preprocessing.YAHOO)
-
-            # Add batch dimension
-            input_data = np.expand_dims(processed_image, axis=0)
+        # All threads share one batching inference thread instead of calling the model directly
+        self.batcher = InferenceBatcher(
+            self.backend.predict,
+            max_batch=self.batch_size,
+            max_wait=self.batch_wait_ms / 1000,
+            logger=self.logger
+        )
+        self.batcher.start()
 
-            # Get prediction
-            predictions = self.model.predict(input_data, verbose=0)
+    def _predict(self, processed_images: List[np.ndarray]) -> List[float]:
+        """Queue preprocessed images for batched inference and return their NSFW probabilities"""
+        futures = [self.batcher.submit(processed_image) for processed_image in processed_images]
+        # NSFW probability is the second value in each prediction
+        return [float(future.result()[1]) for future in futures]
 
-            # Return NSFW probability (second value in prediction)
-            return float(predictions[0][1])
-        except Exception as e:
-            self.logger.error(f"Error processing image: {str(e)}")
-            return 1.0  # Return high score on error to be safe
+    def close(self) -> None:
+        """Stop the inference thread once queued images are scored"""
+        self.batcher.close()
 
     def _process_frames(self, frames: List[Image.Image]) -> List[float]:
         """Process multiple frames in batch"""
-        try:
-            # Preprocess all frames
-            processed_frames = [n2.preprocess_image(frame, n2.Preprocessing.YAHOO) for frame in frames]
-
-            # Stack into batch
-            batch = np.stack(processed_frames)
+        # Preprocess all frames
+        processed_frames = [n2.preprocess_image(frame, n2.Preprocessing.YAHOO) for frame in frames]
 
-            # Get predictions
-            predictions = self.model.predict(batch, verbose=0)
+        # Get predictions; the batcher splits them into model batches
+        return self._predict(processed_frames)
 
-            # Return NSFW probabilities
-            return [float(pred[1]) for pred in predictions]
-        except Exception as e:
-            self.logger.error(f"Error processing frames: {str(e)}")
-            return [1.0] * len(frames)  # Return high scores on error
-
-    def check_gif(self, gif_path: Path) -> Tuple[bool, float]:
+    def check_gif(self, gif_path: Path) -> Tuple[bool, Optional[float]]:
         """Check if a GIF contains NSFW content"""
         try:
             with Image.open(str(gif_path)) as gif:
@@ -1357,16 +1800,9 @@ class NSFWDetector:
                         break
 
                 if not frames:
-                    return True, 1.0  # Err on the side of caution if no frames
+                    return True, None  # Err on the side of caution if no frames
 
-                # Process frames in batches
-                batch_size = 16
-                all_scores = []
-
-                for i in range(0, len(frames), batch_size):
-                    batch_frames = frames[i:i + batch_size]
-                    scores = self._process_frames(batch_frames)
-                    all_scores.extend(scores)
+                all_scores = self._process_frames(frames)
 
                 # Calculate final results
                 max_score = max(all_scores)
@@ -1385,20 +1821,26 @@ class NSFWDetector:
 
         except Exception as e:
             self.logger.error(f"Error analyzing GIF {gif_path}: {str(e)}")
-            return True, 1.0  # Err on the side of caution
+            return True, None  # Err on the side of caution
 
-    def check_image(self, image_path: Path) -> Tuple[bool, float]:
+    def check_image(self, image_path: Path) -> Tuple[bool, Optional[float]]:
         """Check if a static image contains NSFW content"""
         try:
-            # For single images, we can use the simpler predict_image function
-            nsfw_score = n2.predict_image(str(image_path))
+            with Image.open(str(image_path)) as image:
+                processed_image = n2.preprocess_image(image, n2.Preprocessing.YAHOO)
+            nsfw_score = self._predict([processed_image])[0]
             return nsfw_score > self.threshold, nsfw_score
         except Exception as e:
             self.logger.error(f"Error checking image {image_path}: {str(e)}")
-            return True, 1.0
+            return True, None
+
+    def check_content(self, file_path: Path) -> Tuple[bool, Optional[float]]:
+        """
+        Universal checker that handles both static images and GIFs.
 
-    def check_content(self, file_path: Path) -> Tuple[bool, float]:
-        """Universal checker that handles both static images and GIFs"""
+        Files that can't be scored count as NSFW to be safe, with a score of None so callers
+        can tell the fallback from a real verdict.
+        """
         try:
             with Image.open(str(file_path)) as img:
                 is_gif = getattr(img, "is_animated", False)
@@ -1409,186 +1851,3210 @@ class NSFWDetector:
                 return self.check_image(file_path)
         except Exception as e:
             self.logger.error(f"Error determining file type: {str(e)}")
-            return True, 1.0
+            return True, None
 
 
-from abc import ABC, abstractmethod
-import logging
-from typing import Dict, List, Optional
-import threading
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass, field
-from threading import Lock
-from pathlib import Path
-import time
+# Detector owned by each inference worker process, loaded once by the pool initializer
+_process_detector: Optional['NSFWDetector'] = None
+
+
+def _init_inference_process(threshold: float, batch_size: int, backend: str,
+                            backend_options: Dict[str, Any]) -> None:
+    global _process_detector
+    # Calls reach a worker one at a time, so a batch never waits for more images
+    _process_detector = NSFWDetector(threshold=threshold, batch_size=batch_size, batch_wait_ms=0,
+                                     backend=backend, backend_options=backend_options)
+
+
+def _check_content_in_process(file_path: str) -> Tuple[bool, Optional[float]]:
+    return _process_detector.check_content(Path(file_path))
+
+
+class ProcessInferencePool:
+    """
+    NSFW detection in a pool of worker processes, each loading the model once.
+
+    Drop-in for NSFWDetector.check_content: callers pass the path of a downloaded file and
+    block on the result, so inference runs outside this process's GIL and thread pools and
+    scales across cores while the crawler threads keep listing and downloading. Workers
+    are spawned rather than forked so they don't inherit browser or TensorFlow state.
+    """
+
+    def __init__(self, processes: int, threshold: float = 0.5, batch_size: int = 16, backend: str = 'keras',
+                 backend_options: Dict[str, Any] = None, max_restarts: int = 5, logger: logging.Logger = None):
+        self.processes = processes
+        self.threshold = threshold
+        self.max_restarts = max_restarts
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._initargs = (threshold, batch_size, backend, backend_options or {})
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+        self.stats = {'checked': 0, 'errors': 0, 'restarts': 0}
+        self.logger.info(f"Started {processes} NSFW inference processes")
+
+    def _new_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_inference_process,
+            initargs=self._initargs
+        )
+
+    def _restart(self, broken: concurrent.futures.ProcessPoolExecutor) -> bool:
+        """Replace a pool broken by a dead worker, unless another thread already did or restarts ran out"""
+        with self._lock:
+            if self._executor is not broken:
+                return True
+            if self.stats['restarts'] >= self.max_restarts:
+                return False
+            self.stats['restarts'] += 1
+            self.logger.warning(f"Inference worker died, restarting the process pool "
+                                f"({self.stats['restarts']}/{self.max_restarts})")
+            broken.shutdown(wait=False)
+            self._executor = self._new_executor()
+            return True
+
+    def check_content(self, file_path: Path) -> Tuple[bool, Optional[float]]:
+        """Same contract as NSFWDetector.check_content, including a None score when the file couldn't be scored"""
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                result = executor.submit(_check_content_in_process, str(file_path)).result()
+                with self._lock:
+                    self.stats['checked'] += 1
+                return result
+            except BrokenProcessPool as e:
+                # Every later submit fails too until the pool is replaced
+                self.logger.error(f"Inference process pool broken while checking {file_path}: {str(e)}")
+                if attempt or not self._restart(executor):
+                    break
+            except Exception as e:
+                self.logger.error(f"Inference process failed for {file_path}: {str(e)}")
+                break
+
+        # Err on the side of caution like the detector does
+        with self._lock:
+            self.stats['errors'] += 1
+        return True, None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.logger.info(f"Inference process pool stats: {self.stats}")
+
+
+class TokenBucket:
+    """Token bucket for one host; callers reserve a token and sleep outside the lock"""
+
+    def __init__(self, rate: float, burst: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_penalty = 0.0
+        self.penalties = 0
+        self.waiting = 0
+
+    def reserve(self, now: float, recovery_seconds: float) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        # Climb back towards the configured rate once the host stops returning 429
+        if self.rate < self.base_rate and now - self.last_penalty >= recovery_seconds:
+            self.rate = min(self.base_rate, self.rate * 2)
+            self.last_penalty = now
+
+        start = max(now, self.paused_until)
+        self.tokens = min(float(self.burst), self.tokens + (start - self.updated) * self.rate)
+        self.updated = start
+        self.tokens -= 1
+        wait = start - now
+        if self.tokens < 0:
+            wait += -self.tokens / self.rate
+        return wait
+
+
+class HostRateLimiter:
+    """
+    Per-host token buckets shared by every thread and the asyncio download stage.
+
+    Each bucket allows `rate` requests per second with up to `burst` back to back, so the
+    configured delays bound the request rate to a host regardless of how many workers run.
+    A 429 halves the host's rate and pauses it for Retry-After; the rate doubles back
+    towards the configured value every recovery_seconds without another 429.
+    """
+
+    def __init__(self, burst: int = 4, min_rate_fraction: float = 0.1, recovery_seconds: float = 30.0,
+                 logger: logging.Logger = None):
+        self.burst = burst
+        self.min_rate_fraction = min_rate_fraction
+        self.recovery_seconds = recovery_seconds
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _host(url_or_host: str) -> str:
+        return urlparse(url_or_host).netloc or url_or_host
+
+    def _reserve(self, url: str, rate: Optional[float]) -> Tuple[Optional[TokenBucket], float]:
+        if not rate:
+            return None, 0.0
+        host = self._host(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+            wait = bucket.reserve(time.monotonic(), self.recovery_seconds)
+            if wait > 0:
+                bucket.waiting += 1
+            return bucket, wait
+
+    def _done_waiting(self, bucket: TokenBucket) -> None:
+        with self._lock:
+            bucket.waiting -= 1
+
+    def acquire(self, url: str, rate: Optional[float]) -> float:
+        """Block the calling thread until a request to the URL's host is allowed, returns seconds waited"""
+        bucket, wait = self._reserve(url, rate)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting(bucket)
+        return wait
+
+    async def acquire_async(self, url: str, rate: Optional[float]) -> float:
+        """Async variant of acquire for the download event loop"""
+        bucket, wait = self._reserve(url, rate)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._done_waiting(bucket)
+        return wait
+
+    def penalize(self, url_or_host: str, retry_after: Optional[float] = None) -> None:
+        """Slow a host down after it answered 429 Too Many Requests"""
+        host = self._host(url_or_host)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                return
+            now = time.monotonic()
+            bucket.rate = max(bucket.rate / 2, bucket.base_rate * self.min_rate_fraction)
+            bucket.last_penalty = now
+            bucket.penalties += 1
+            if retry_after:
+                bucket.paused_until = max(bucket.paused_until, now + retry_after)
+            rate = bucket.rate
+
+        self.logger.warning(f"Rate limited by {host}, slowing to {rate:.2f} req/s"
+                            + (f" after a {retry_after:.0f}s pause" if retry_after else ""))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Current rate, configured rate, 429 count and number of waiting callers per host"""
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(bucket.rate, 3),
+                    'configured_rate': round(bucket.base_rate, 3),
+                    'penalties': bucket.penalties,
+                    'queue_depth': bucket.waiting
+                }
+                for host, bucket in self._buckets.items()
+            }
+
+
+class RateLimitedRetry(Retry):
+    """urllib3 Retry that reports every 429 it retries to a HostRateLimiter"""
+
+    def __init__(self, *args, on_rate_limited: Callable[[str, Optional[float]], None] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_rate_limited = on_rate_limited
+
+    def new(self, **kwargs) -> 'RateLimitedRetry':
+        retry = super().new(**kwargs)
+        retry.on_rate_limited = self.on_rate_limited
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and response.status == 429 and self.on_rate_limited and _pool is not None:
+            self.on_rate_limited(_pool.host, self.get_retry_after(response))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run
+DATABASE_MIGRATIONS = [
+    # 1: original download log
+    '''
+    CREATE TABLE IF NOT EXISTS downloads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE,
+        filename TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        status TEXT,
+        file_size INTEGER,
+        md5_hash TEXT,
+        source_page TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS failed_downloads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        error_message TEXT,
+        attempts INTEGER DEFAULT 1
+    );
+    ''',
+    # 2: lookups used by duplicate checks and failure upserts
+    '''
+    CREATE INDEX IF NOT EXISTS idx_downloads_md5 ON downloads(md5_hash);
+    CREATE INDEX IF NOT EXISTS idx_failed_downloads_url ON failed_downloads(url);
+    ''',
+    # 3: catalog of posts, kept files, characters and tags
+    '''
+    CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        site TEXT NOT NULL,
+        post_id INTEGER,
+        md5 TEXT,
+        rating TEXT,
+        source_page TEXT,
+        first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (site, post_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS characters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        series TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL UNIQUE,
+        path TEXT,
+        md5 TEXT,
+        file_size INTEGER,
+        nsfw_score REAL,
+        is_animated INTEGER DEFAULT 0,
+        post_ref INTEGER REFERENCES posts(id),
+        character_id INTEGER REFERENCES characters(id),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS post_tags (
+        post_ref INTEGER NOT NULL REFERENCES posts(id),
+        tag TEXT NOT NULL,
+        PRIMARY KEY (post_ref, tag)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_posts_md5 ON posts(md5);
+    CREATE INDEX IF NOT EXISTS idx_files_md5 ON files(md5);
+    CREATE INDEX IF NOT EXISTS idx_files_character ON files(character_id);
+    CREATE INDEX IF NOT EXISTS idx_files_post ON files(post_ref);
+    CREATE INDEX IF NOT EXISTS idx_post_tags_tag ON post_tags(tag);
+
+    -- Earlier runs only logged downloads; carry their kept files over without post metadata.
+    -- downloads.filename is a bare name with no character directory, so the path stays unknown
+    INSERT OR IGNORE INTO files (url, md5, file_size, created_at)
+    SELECT url, md5_hash, file_size, timestamp FROM downloads WHERE status = 'success';
+    ''',
+    # 4: newest post id reached by the last completed crawl of each query
+    '''
+    CREATE TABLE IF NOT EXISTS crawl_state (
+        site TEXT NOT NULL,
+        query TEXT NOT NULL,
+        high_water_post_id INTEGER NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (site, query)
+    );
+    ''',
+    # 5: page each character reached, for resuming interrupted runs
+    '''
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        site TEXT NOT NULL,
+        character TEXT NOT NULL,
+        url_index INTEGER NOT NULL,
+        url TEXT,
+        page_num INTEGER NOT NULL DEFAULT 0,
+        cursor TEXT,
+        completed INTEGER DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (site, character)
+    );
+    ''',
+    # 6: classification results per file content, so repeats skip inference
+    '''
+    CREATE TABLE IF NOT EXISTS nsfw_scores (
+        md5 TEXT NOT NULL,
+        model_version TEXT NOT NULL,
+        threshold REAL NOT NULL,
+        is_nsfw INTEGER NOT NULL,
+        score REAL NOT NULL,
+        is_animated INTEGER DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (md5, model_version)
+    ) WITHOUT ROWID;
+    ''',
+]
+
+
+def migrate_database(conn: sqlite3.Connection, logger: logging.Logger = None) -> int:
+    """Bring a downloads database up to the latest schema, returns the resulting version"""
+    logger = logger or logging.getLogger(__name__)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, script in enumerate(DATABASE_MIGRATIONS[version:], start=version + 1):
+        # executescript commits first, so wrap each step in its own transaction
+        conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+        logger.info(f"Applied database migration {number}")
+    return len(DATABASE_MIGRATIONS)
+
+
+class DatabaseWriter:
+    """
+    Single writer thread that owns the only write connection to the downloads database.
+
+    Workers enqueue statements and return immediately. The writer commits them in one
+    transaction per batch_size rows or flush_interval seconds, whichever comes first, so
+    there is no cross-thread lock contention and no fsync per image.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, db_path: Path, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_commit_retries: int = 5, logger: logging.Logger = None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_commit_retries = max_commit_retries
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._queue: Queue = Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'statements': 0, 'transactions': 0, 'errors': 0, 'ignored': 0}
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        """Queue one statement; it is committed with the next batch"""
+        self._queue.put([(sql, params)])
+
+    def execute_many(self, statements: List[Tuple[str, tuple]]) -> None:
+        """Queue statements that must run back to back in the same transaction"""
+        self._queue.put(list(statements))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything queued so far is committed"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Commit whatever is queued and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        self.logger.info(f"Database writer stats: {self.stats}")
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+
+        batch: List[Tuple[str, tuple]] = []
+        waiters: List[threading.Event] = []
+        deadline = None
+        stopping = False
+        try:
+            while not stopping:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except Empty:
+                    item = None
+
+                if item is self._STOP:
+                    stopping = True
+                elif isinstance(item, tuple) and item[0] is self._FLUSH:
+                    waiters.append(item[1])
+                elif item is not None:
+                    batch.extend(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                due = deadline is not None and time.monotonic() >= deadline
+                if batch and (stopping or waiters or due or len(batch) >= self.batch_size):
+                    self._commit(conn, batch)
+                    batch = []
+                    deadline = None
+                elif not batch:
+                    deadline = None
+
+                for event in waiters:
+                    event.set()
+                waiters = []
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple[str, tuple]]) -> None:
+        for attempt in range(self.max_commit_retries):
+            try:
+                cursor = conn.cursor()
+                for sql, params in batch:
+                    try:
+                        cursor.execute(sql, params)
+                        if cursor.rowcount == 0 and sql.lstrip().upper().startswith('INSERT OR IGNORE'):
+                            self.stats['ignored'] += 1
+                    except sqlite3.OperationalError as e:
+                        if 'locked' in str(e) or 'busy' in str(e):
+                            raise
+                        self.stats['errors'] += 1
+                        self.logger.error(f"Database write failed: {str(e)}")
+                    except sqlite3.Error as e:
+                        # A failed statement is undone on its own; the rest of the batch still commits
+                        self.stats['errors'] += 1
+                        self.logger.error(f"Database write failed: {str(e)}")
+                conn.commit()
+                self.stats['statements'] += len(batch)
+                self.stats['transactions'] += 1
+                return
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                self.logger.warning(f"Database busy committing {len(batch)} rows (attempt {attempt + 1}): {str(e)}")
+                time.sleep(0.1 * 2 ** attempt)
+
+        self.stats['errors'] += len(batch)
+        self.logger.error(f"Dropped {len(batch)} database writes after {self.max_commit_retries} attempts")
+
+
+class MeteredHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that exposes the connection counters of its urllib3 pools"""
+
+    def connection_stats(self) -> Tuple[int, int]:
+        """Return (connections opened, requests sent) across this adapter's pools"""
+        pools = self.poolmanager.pools
+        with pools.lock:
+            host_pools = list(pools._container.values())
+        return (sum(pool.num_connections for pool in host_pools),
+                sum(pool.num_requests for pool in host_pools))
+
+
+class HTTPSessionPool:
+    """
+    Per-host keep-alive sessions shared by all worker threads.
+
+    Each host gets one requests.Session whose adapter keeps up to pool_maxsize idle
+    connections, so downloads reuse TCP+TLS connections instead of opening one per file.
+    Sessions are shared across threads; urllib3's connection pool is thread-safe.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, config: ScraperConfig, pool_maxsize: int = None, rate_limiter: HostRateLimiter = None,
+                 logger: logging.Logger = None):
+        self.config = config
+        self.pool_maxsize = pool_maxsize or config.http_pool_maxsize
+        self.rate_limiter = rate_limiter or HostRateLimiter(burst=config.rate_limit_burst, logger=logger)
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, MeteredHTTPAdapter] = {}
+
+    def _make_retry(self) -> Retry:
+        return RateLimitedRetry(
+            total=self.config.retry_attempts,
+            backoff_factor=0.5,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            on_rate_limited=self.rate_limiter.penalize
+        )
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get or create the shared session for the URL's host"""
+        parsed = urlparse(url)
+        host = f"{parsed.scheme}://{parsed.netloc}"
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                adapter = MeteredHTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=self._make_retry()
+                )
+                session = requests.Session()
+                session.headers.update({'User-Agent': self.config.user_agent})
+                session.mount(f"{parsed.scheme}://", adapter)
+                self._sessions[host] = session
+                self._adapters[host] = adapter
+                self.logger.debug(f"Created pooled HTTP session for {host} (pool_maxsize={self.pool_maxsize})")
+
+        return session
+
+    def get(self, url: str, rate: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET through the host's shared session, first waiting for a token if a rate is given"""
+        self.rate_limiter.acquire(url, rate)
+        return self.session_for(url).get(url, **kwargs)
+
+    def head(self, url: str, rate: Optional[float] = None, **kwargs) -> requests.Response:
+        self.rate_limiter.acquire(url, rate)
+        return self.session_for(url).head(url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Connection reuse per host; every reused HTTPS connection is a TLS handshake saved"""
+        with self._lock:
+            adapters = dict(self._adapters)
+
+        stats = {}
+        for host, adapter in adapters.items():
+            connections, requests_sent = adapter.connection_stats()
+            reused = max(requests_sent - connections, 0)
+            stats[host] = {
+                'requests': requests_sent,
+                'connections': connections,
+                'reuse_rate': round(reused / requests_sent, 3) if requests_sent else 0.0,
+                'tls_handshakes_saved': reused if host.startswith('https') else 0
+            }
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            session.close()
 
 
 @dataclass
-class ScraperState:
-    """Thread-safe state tracking for scraper"""
-    active_characters: Set[str] = field(default_factory=set)
-    completed_characters: Set[str] = field(default_factory=set)
-    lock: threading.Lock = field(default_factory=threading.Lock)
-    browser_lock: threading.Lock = field(default_factory=threading.Lock)
-    logger: logging.Logger = field(default=None)
+class DownloadJob:
+    """A file handed from the listing stage to the download stage"""
+    url: str
+    source_page: Optional[str]
+    filename: str
+    temp_path: Path
+    final_path: Path
+    headers: Dict[str, str] = field(default_factory=dict)
+    post: Optional['BooruPost'] = None
+    character: Optional[str] = None
+    series: Optional[str] = None
+    preview_url: Optional[str] = None  # Small rendition to classify before fetching url
+    preview_path: Optional[Path] = None
+    nsfw_verdict: Optional[Tuple[bool, float]] = None  # Set once the preview passed screening
+
+
+class ResizableLimiter:
+    """Counting semaphore for threads whose limit can be changed while it is in use"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self) -> 'ResizableLimiter':
+        with self._cond:
+            self.waiting += 1
+            try:
+                self._cond.wait_for(lambda: self.active < self.limit)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def set_limit(self, limit: int) -> None:
+        """Change the limit; a lower one takes effect as holders exit"""
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+
+class AsyncDownloadEngine:
+    """
+    asyncio download stage running on its own event loop thread.
+
+    Listing threads hand jobs over through a bounded queue (submit blocks when it is full),
+    files are fetched with a per-host concurrency limit, and each finished file is passed to
+    a small thread pool for verification and NSFW classification, so listing, downloading
+    and classification overlap. Jobs carrying a preview URL are screened on that rendition
+    first and their original is only fetched if it passes. Uses aiohttp when installed,
+    otherwise runs the fetch on the shared requests session pool in worker threads.
+    """
+
+    def __init__(self, config: ScraperConfig, http: HTTPSessionPool, finalize: Callable[[DownloadJob], Optional[bool]],
+                 on_failure: Callable[[str, str], None] = None, screen: Callable[[DownloadJob], bool] = None,
+                 logger: logging.Logger = None):
+        self.config = config
+        self.http = http
+        self.finalize = finalize
+        self.screen = screen
+        self.on_failure = on_failure
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+
+        self._start_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._client = None
+        self.concurrency = config.download_concurrency
+        self.classify_limit = ResizableLimiter(config.classification_workers)
+        # Sized for the largest pools the worker controller may grow to; threads start lazily
+        self._fetch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.max_download_concurrency, thread_name_prefix="download-io")
+        self._finalize_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.max_classification_workers, thread_name_prefix="classify")
+
+        self.stats = {'queued': 0, 'fetched': 0, 'kept': 0, 'rejected': 0, 'screened_out': 0, 'failed': 0,
+                      'fetch_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def pending(self) -> int:
+        """Jobs queued but not yet picked up by a download slot"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def set_concurrency(self, concurrency: int) -> None:
+        """Change how many downloads run at once; a lower limit takes effect as downloads finish"""
+        if self._loop is None:
+            self.concurrency = concurrency
+            return
+        self._loop.call_soon_threadsafe(self._resize_slots, concurrency)
+
+    def _resize_slots(self, concurrency: int) -> None:
+        delta = concurrency - self.concurrency
+        self.concurrency = concurrency
+        for _ in range(delta):
+            self._slots.release()
+        # Shrinking parks tasks on the spare permits until running downloads hand them back
+        for _ in range(-delta):
+            self._loop.create_task(self._slots.acquire())
+
+    def _classify(self, job: DownloadJob) -> Optional[bool]:
+        with self.classify_limit:
+            return self.finalize(job)
+
+    def _screen(self, job: DownloadJob) -> bool:
+        with self.classify_limit:
+            return self.screen(job)
+
+    def start(self) -> None:
+        """Start the event loop thread; safe to call more than once"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+
+            def run_loop():
+                asyncio.set_event_loop(self._loop)
+                self._queue = asyncio.Queue(maxsize=self.config.download_queue_size)
+                self._slots = asyncio.Semaphore(self.concurrency)
+                self._loop.create_task(self._dispatch())
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name="download-engine", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self.logger.info(f"Async download engine started (aiohttp={'yes' if aiohttp else 'no'})")
+
+    def submit(self, job: DownloadJob) -> None:
+        """Queue a job from a listing thread, blocking while the queue is full"""
+        self.start()
+        asyncio.run_coroutine_threadsafe(self._queue.put(job), self._loop).result()
+        self._count('queued')
+
+    def join(self) -> None:
+        """Block until every queued job has been downloaded and classified"""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop).result()
+
+    def stop(self) -> None:
+        """Drain outstanding work, then stop the loop and worker pools"""
+        if self._thread is None:
+            return
+        self.join()
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=30)
+        self._fetch_executor.shutdown(wait=True)
+        self._finalize_executor.shutdown(wait=True)
+        self._thread = None
+        self.logger.info(f"Async download engine stopped: {self.stats}")
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._slots.acquire()
+            job = await self._queue.get()
+            self._loop.create_task(self._run(job))
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.config.per_host_download_concurrency)
+        return self._host_limits[host]
+
+    async def _run(self, job: DownloadJob) -> None:
+        try:
+            # Screen posts on their small rendition first and only fetch originals that pass
+            if job.preview_url is not None and self.screen is not None:
+                if await self._download(job, job.preview_url, job.preview_path, record_failure=False):
+                    passed = await self._loop.run_in_executor(self._finalize_executor, self._screen, job)
+                    if not passed:
+                        self._count('screened_out')
+                        return
+
+            if await self._download(job, job.url, job.temp_path):
+                self._count('fetched')
+                kept = await self._loop.run_in_executor(self._finalize_executor, self._classify, job)
+                self._count('failed' if kept is None else 'kept' if kept else 'rejected')
+            else:
+                self._count('failed')
+        except Exception as e:
+            self._count('failed')
+            self.logger.error(f"Error in download pipeline for {job.url}: {str(e)}")
+        finally:
+            self._slots.release()
+            self._queue.task_done()
+
+    async def _download(self, job: DownloadJob, url: str, path: Path, record_failure: bool = True) -> bool:
+        async with self._host_limit(url):
+            await self.http.rate_limiter.acquire_async(url, self.config.download_rate)
+            started = time.monotonic()
+            fetched = await self._fetch(job, url, path, record_failure)
+            self._count('fetch_seconds', time.monotonic() - started)
+        return fetched
+
+    async def _fetch(self, job: DownloadJob, url: str, path: Path, record_failure: bool = True) -> bool:
+        """Download url to path with the job's headers, returns False on failure"""
+        try:
+            if aiohttp is None:
+                await self._loop.run_in_executor(self._fetch_executor, self._fetch_sync, job, url, path)
+            else:
+                await self._fetch_aiohttp(job, url, path)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error downloading {url}: {str(e)}")
+            if record_failure and self.on_failure is not None:
+                self.on_failure(url, str(e))
+            if path.exists():
+                path.unlink()
+            return False
+
+    def _fetch_sync(self, job: DownloadJob, url: str, path: Path) -> None:
+        with self.http.get(url, stream=True, headers=job.headers,
+                           timeout=self.config.request_timeout) as response:
+            response.raise_for_status()
+            with open(path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.config.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+
+    async def _fetch_aiohttp(self, job: DownloadJob, url: str, path: Path) -> None:
+        if self._client is None:
+            self._client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.config.per_host_download_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.config.request_timeout)
+            )
+
+        for attempt in range(self.config.retry_attempts):
+            async with self._client.get(url, headers=job.headers) as response:
+                if response.status in HTTPSessionPool.RETRY_STATUSES and attempt < self.config.retry_attempts - 1:
+                    retry_after = response.headers.get('Retry-After', '')
+                    delay = float(retry_after) if retry_after.isdigit() else 0.5 * 2 ** attempt
+                    if response.status == 429:
+                        self.http.rate_limiter.penalize(url, delay)
+                    await asyncio.sleep(delay)
+                    await self.http.rate_limiter.acquire_async(url, self.config.download_rate)
+                    continue
+                response.raise_for_status()
+                with open(path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.config.chunk_size):
+                        f.write(chunk)
+                return
+
+
+RATING_ALIASES = {
+    'g': 'general',
+    'general': 'general',
+    's': 'sensitive',
+    'safe': 'general',
+    'sensitive': 'sensitive',
+    'q': 'questionable',
+    'questionable': 'questionable',
+    'e': 'explicit',
+    'explicit': 'explicit',
+}
+
+
+@dataclass(frozen=True)
+class RatingPolicy:
+    """
+    Decides from a post's booru rating whether the NSFW model needs to see the file.
+
+    Ratings in accept are kept without inference, ratings in reject are dropped before
+    download, and anything else, including posts with no rating, goes to the model.
+    """
+    accept: frozenset = frozenset({'explicit'})
+    reject: frozenset = frozenset({'general'})
+
+    @classmethod
+    def from_config(cls, config: 'ScraperConfig') -> 'RatingPolicy':
+        if not config.use_rating_policy:
+            return cls(accept=frozenset(), reject=frozenset())
+        return cls(accept=frozenset(RATING_ALIASES.get(r.lower(), r.lower()) for r in config.rating_accept),
+                   reject=frozenset(RATING_ALIASES.get(r.lower(), r.lower()) for r in config.rating_reject))
+
+    def decide(self, rating: Optional[str]) -> Optional[bool]:
+        """True to keep, False to drop, None when the model has to decide"""
+        if not rating:
+            return None
+        if rating in self.accept:
+            return True
+        if rating in self.reject:
+            return False
+        return None
+
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+
+# Booru originals, samples and previews are all named after the original file's md5
+MD5_FILENAME_PATTERN = re.compile(r'(?:^|[/_-])([0-9a-f]{32})\.\w+$', re.IGNORECASE)
+
+# Post pages are index.php?page=post&s=view&id=N on Gelbooru and /posts/N on Danbooru
+POST_ID_PATTERN = re.compile(r'(?:[?&]id=|/posts/)(\d+)')
+
+
+def md5_from_url(url: str) -> Optional[str]:
+    """Return the md5 embedded in a booru file URL, or None if the filename doesn't carry one"""
+    if not url:
+        return None
+    match = MD5_FILENAME_PATTERN.search(urlparse(url).path)
+    return match.group(1).lower() if match else None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for an expected count and false positive rate"""
+
+    MAGIC = b'BLM1'
+    HEADER = struct.Struct('>4sQIQq')  # magic, bit count, hash count, items added, source high-water id
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path: Path, high_water_id: int) -> None:
+        """Write the filter atomically, tagged with the highest source row id it covers"""
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, self.count, high_water_id))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, error_rate: float = 0.001) -> Tuple['BloomFilter', int]:
+        """Read a filter written by save, returns it with its high-water id"""
+        with open(path, 'rb') as f:
+            magic, num_bits, num_hashes, count, high_water_id = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bits = bytearray(f.read())
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError(f"{path} is truncated")
+
+        bloom = cls.__new__(cls)
+        bloom.error_rate = error_rate
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.capacity = max(1, int(-num_bits * (math.log(2) ** 2) / math.log(error_rate)))
+        bloom.bits = bits
+        bloom.count = count
+        return bloom, high_water_id
+
+
+class KnownContentIndex:
+    """
+    Membership index over every downloaded URL and md5, so duplicate checks rarely touch SQLite.
+
+    A Bloom filter answers "definitely new" from memory. Positives are confirmed against the
+    downloads table unless the key was added during this run. The filter is saved next to the
+    database with the highest row id it covers, so a restart only scans rows added since.
+    """
+
+    def __init__(self, db_path: Path, cache_path: Path, error_rate: float = 0.001,
+                 min_capacity: int = 1_000_000, logger: logging.Logger = None):
+        self.db_path = db_path
+        self.cache_path = cache_path
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.bloom: Optional[BloomFilter] = None
+        self.high_water_id = 0
+        self._recent: Set[str] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self.stats = {'lookups': 0, 'filtered': 0, 'confirmed': 0, 'false_positives': 0}
+
+    @staticmethod
+    def _md5_key(md5: str) -> str:
+        return f"md5:{md5.lower()}"
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return f"url:{url}"
+
+    def load(self) -> None:
+        """Restore the saved filter and catch up on newer rows, or rebuild it from the table"""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            row_count, max_id = conn.execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM downloads').fetchone()
+            bloom = None
+            if self.cache_path.exists():
+                try:
+                    bloom, saved_id = BloomFilter.load(self.cache_path, self.error_rate)
+                    if saved_id > max_id or row_count > bloom.capacity:
+                        self.logger.info("Saved content filter is stale or full, rebuilding")
+                        bloom = None
+                except (OSError, ValueError, struct.error) as e:
+                    self.logger.warning(f"Could not read content filter {self.cache_path}: {str(e)}")
+                    bloom = None
+
+            if bloom is None:
+                bloom, saved_id = BloomFilter(max(self.min_capacity, row_count * 2), self.error_rate), 0
+
+            added = 0
+            for row_id, url, md5 in conn.execute(
+                    'SELECT id, url, md5_hash FROM downloads WHERE id > ? ORDER BY id', (saved_id,)):
+                bloom.add(self._url_key(url))
+                if md5:
+                    bloom.add(self._md5_key(md5))
+                added += 1
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.bloom = bloom
+            self.high_water_id = max_id
+        self.logger.info(f"Content filter covers {row_count} downloads ({added} scanned, {bloom.count} keys)")
+
+    def save(self) -> None:
+        with self._lock:
+            if self.bloom is None:
+                return
+            self.bloom.save(self.cache_path, self.high_water_id)
+        self.logger.info(f"Saved content filter to {self.cache_path}")
+
+    def add(self, url: str = None, md5: str = None) -> None:
+        """Record a kept file; both keys are exact-matched for the rest of the run"""
+        keys = ([self._url_key(url)] if url else []) + ([self._md5_key(md5)] if md5 else [])
+        with self._lock:
+            for key in keys:
+                self.bloom.add(key)
+                self._recent.add(key)
+
+    def _reader(self) -> sqlite3.Connection:
+        if not hasattr(self._local, 'conn'):
+            self._local.conn = sqlite3.connect(str(self.db_path), timeout=30.0, check_same_thread=False)
+            with self._lock:
+                self._readers.append(self._local.conn)
+        return self._local.conn
+
+    def _contains(self, key: str, query: str, value: str) -> bool:
+        with self._lock:
+            self.stats['lookups'] += 1
+            if key not in self.bloom:
+                self.stats['filtered'] += 1
+                return False
+            if key in self._recent:
+                return True
+            self.stats['confirmed'] += 1
+
+        found = self._reader().execute(query, (value,)).fetchone() is not None
+        if not found:
+            with self._lock:
+                self.stats['false_positives'] += 1
+        return found
+
+    def contains_md5(self, md5: str) -> bool:
+        return self._contains(self._md5_key(md5), 'SELECT 1 FROM downloads WHERE md5_hash = ? LIMIT 1', md5.lower())
+
+    def contains_url(self, url: str) -> bool:
+        return self._contains(self._url_key(url), 'SELECT 1 FROM downloads WHERE url = ? LIMIT 1', url)
+
+    def close(self) -> None:
+        with self._lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+
+class NSFWScoreCache:
+    """
+    Classification results keyed by content md5 and model version.
+
+    Verdicts live in the nsfw_scores table, so a file reached again through another tag
+    query or on a later run is never decoded or scored twice. An in-memory LRU in front of
+    the table serves repeats within a run; new scores are written through the database
+    writer. A stored verdict only counts for the threshold it was made with. Verdicts made
+    on a post's preview rendition are stored under the original's md5 with a separate model
+    version, so they can skip a download without standing in for a full-image score.
+    """
+
+    def __init__(self, db_path: Path, db_writer: DatabaseWriter, model_version: str, threshold: float,
+                 capacity: int = 100_000, logger: logging.Logger = None):
+        self.db_path = db_path
+        self.db_writer = db_writer
+        self.model_version = model_version
+        self.threshold = threshold
+        self.capacity = capacity
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._entries: 'OrderedDict[Tuple[str, bool], Tuple[bool, float, bool]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stored': 0}
+
+    def _reader(self) -> sqlite3.Connection:
+        if not hasattr(self._local, 'conn'):
+            self._local.conn = sqlite3.connect(str(self.db_path), timeout=30.0, check_same_thread=False)
+            with self._lock:
+                self._readers.append(self._local.conn)
+        return self._local.conn
+
+    def _version(self, preview: bool) -> str:
+        return f"{self.model_version}+preview" if preview else self.model_version
+
+    def _remember(self, key: Tuple[str, bool], verdict: Tuple[bool, float, bool]) -> None:
+        # Caller holds self._lock
+        self._entries[key] = verdict
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, md5: str, preview: bool = False) -> Optional[Tuple[bool, float, bool]]:
+        """Return (is_nsfw, score, is_animated) if this content, or its preview, was classified before"""
+        key = (md5.lower(), preview)
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is not None:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return verdict
+
+        row = self._reader().execute(
+            'SELECT is_nsfw, score, is_animated FROM nsfw_scores WHERE md5 = ? AND model_version = ? AND threshold = ?',
+            (key[0], self._version(preview), self.threshold)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            verdict = (bool(row[0]), row[1], bool(row[2]))
+            self._remember(key, verdict)
+            self.stats['db_hits'] += 1
+        return verdict
+
+    def put(self, md5: str, is_nsfw: bool, score: float, is_animated: bool = False, preview: bool = False) -> None:
+        key = (md5.lower(), preview)
+        with self._lock:
+            self._remember(key, (is_nsfw, score, is_animated))
+            self.stats['stored'] += 1
+        self.db_writer.execute('''
+            INSERT OR REPLACE INTO nsfw_scores (md5, model_version, threshold, is_nsfw, score, is_animated)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (key[0], self._version(preview), self.threshold, int(is_nsfw), score, int(is_animated)))
+
+    def close(self) -> None:
+        with self._lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+
+@dataclass
+class BooruPost:
+    """A single post record returned by a booru listing API"""
+    post_id: int
+    md5: str
+    file_url: str
+    rating: str
+    tags: List[str] = field(default_factory=list)
+    site: str = ''
+    sample_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
     def __post_init__(self):
-        """Initialize logger after creation"""
-        self.logger = logging.getLogger(__name__)
+        """Normalize site specific rating names"""
+        self.rating = RATING_ALIASES.get(str(self.rating).lower(), str(self.rating).lower())
 
-    def is_character_available(self, character: str) -> bool:
-        """Check if character is available for processing"""
-        self.logger.debug(f"Checking availability for {character}")
-        with self.lock:
-            is_available = character not in self.active_characters and character not in self.completed_characters
-            self.logger.debug(f"{character} availability: {is_available}")
-            return is_available
+    @property
+    def extension(self) -> str:
+        """File extension of the original file, including the leading dot"""
+        return os.path.splitext(urlparse(self.file_url).path)[1].lower()
 
-    def start_character(self, character: str) -> bool:
-        """Mark character as being processed"""
-        self.logger.debug(f"Attempting to start {character}")
+    @property
+    def is_image(self) -> bool:
+        """Whether the original is a still image or GIF we can download and classify"""
+        return self.extension in IMAGE_EXTENSIONS
+
+
+class BooruAPIError(Exception):
+    """Raised when a booru listing API request fails or returns unusable data"""
+    pass
+
+
+class BooruAPIClient(ABC):
+    """Base class for plain HTTP booru listing backends"""
+
+    site = ''
+    max_limit = 100
+
+    def __init__(self, config: ScraperConfig, http: HTTPSessionPool = None, logger: logging.Logger = None):
+        self.config = config
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.http = http or HTTPSessionPool(config, logger=self.logger)
+        self.headers = {
+            'User-Agent': self.config.user_agent,
+            'Accept': 'application/json, text/xml;q=0.9, */*;q=0.8'
+        }
+        self.limit = min(self.config.api_page_limit or self.max_limit, self.max_limit)
+
+    @staticmethod
+    def tags_from_url(list_url: str) -> str:
+        """Extract the search tags from a site list URL"""
+        query = parse_qs(urlparse(list_url).query)
+        return ' '.join(query.get('tags', [''])[0].split())
+
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """Issue a listing request and raise BooruAPIError on transport errors"""
+        try:
+            response = self.http.get(url, rate=self.config.listing_rate, params=params, headers=self.headers,
+                                     timeout=self.config.request_timeout)
+            response.raise_for_status()
+            return response
+        except RequestException as e:
+            raise BooruAPIError(f"{self.site} API request failed: {str(e)}") from e
+
+    @abstractmethod
+    def initial_cursor(self) -> Union[int, str]:
+        """Cursor for the newest page of results"""
+        pass
+
+    @abstractmethod
+    def fetch_page(self, tags: str, cursor: Union[int, str]) -> Tuple[List[BooruPost], Optional[Union[int, str]]]:
+        """
+        Fetch a single page of post records
+
+        Returns:
+            Tuple[List[BooruPost], Optional[Union[int, str]]]: Usable posts and the cursor
+            of the following page, or None once the listing is exhausted
+        """
+        pass
+
+    @abstractmethod
+    def post_page_url(self, post: BooruPost, tags: str) -> str:
+        """HTML page URL for a post, used as Referer and for character path detection"""
+        pass
+
+
+class GelbooruAPIClient(BooruAPIClient):
+    """Gelbooru DAPI listing backend (index.php?page=dapi&s=post&q=index)"""
+
+    site = 'gelbooru'
+    max_limit = 100
+
+    def __init__(self, config: ScraperConfig, http: HTTPSessionPool = None, logger: logging.Logger = None,
+                 base_url: str = "https://gelbooru.com"):
+        super().__init__(config, http, logger)
+        self.base_url = base_url.rstrip('/')
+
+    def initial_cursor(self) -> int:
+        return 0
+
+    def fetch_page(self, tags: str, cursor: int) -> Tuple[List[BooruPost], Optional[int]]:
+        """Fetch one DAPI page, accepting either the JSON or the XML response format"""
+        params = {
+            'page': 'dapi',
+            's': 'post',
+            'q': 'index',
+            'json': 1,
+            'limit': self.limit,
+            'pid': cursor,
+            'tags': tags
+        }
+        if self.config.gelbooru_api_key and self.config.gelbooru_user_id:
+            params['api_key'] = self.config.gelbooru_api_key
+            params['user_id'] = self.config.gelbooru_user_id
+
+        response = self._get(f"{self.base_url}/index.php", params)
+        body = response.text.strip()
+        if not body:
+            return [], None
+
+        try:
+            if body.startswith('<'):
+                records = self._parse_xml(body)
+            else:
+                data = response.json()
+                records = data.get('post', []) if isinstance(data, dict) else data
+                if isinstance(records, dict):
+                    records = [records]
+        except (ValueError, ET.ParseError) as e:
+            raise BooruAPIError(f"Unparseable gelbooru API response: {str(e)}") from e
+
+        posts = []
+        for record in records:
+            try:
+                posts.append(BooruPost(
+                    post_id=int(record['id']),
+                    md5=record.get('md5', ''),
+                    file_url=record['file_url'],
+                    rating=record.get('rating', ''),
+                    tags=record.get('tags', '').split(),
+                    site=self.site,
+                    sample_url=record.get('sample_url') or None,
+                    preview_url=record.get('preview_url') or None
+                ))
+            except (KeyError, ValueError) as e:
+                self.logger.debug(f"Skipping malformed gelbooru post record: {str(e)}")
+
+        return posts, (cursor + 1 if len(records) >= self.limit else None)
+
+    @staticmethod
+    def _parse_xml(body: str) -> List[Dict[str, str]]:
+        """Parse both the attribute style and the element style DAPI XML formats"""
+        root = ET.fromstring(body)
+        records = []
+        for node in root.iter('post'):
+            record = dict(node.attrib)
+            for child in node:
+                record[child.tag] = child.text or ''
+            records.append(record)
+        return records
+
+    def post_page_url(self, post: BooruPost, tags: str) -> str:
+        return (f"{self.base_url}/index.php?page=post&s=view&id={post.post_id}"
+                f"&tags={urllib.parse.quote_plus(tags)}")
+
+
+class DanbooruAPIClient(BooruAPIClient):
+    """Danbooru /posts.json listing backend with b<id> cursor pagination"""
+
+    site = 'danbooru'
+    max_limit = 200
+    fields = ['id', 'md5', 'file_url', 'large_file_url', 'preview_file_url', 'rating', 'tag_string']
+
+    def __init__(self, config: ScraperConfig, http: HTTPSessionPool = None, logger: logging.Logger = None,
+                 base_url: str = "https://danbooru.donmai.us"):
+        super().__init__(config, http, logger)
+        self.base_url = base_url.rstrip('/')
+
+    def initial_cursor(self) -> str:
+        return ''
+
+    def fetch_page(self, tags: str, cursor: str) -> Tuple[List[BooruPost], Optional[str]]:
+        """Fetch one page of posts older than the cursor, projecting only the fields we use"""
+        params = {
+            'tags': tags,
+            'limit': self.limit,
+            'only': ','.join(self.fields)
+        }
+        if cursor:
+            params['page'] = cursor
+        if self.config.danbooru_login and self.config.danbooru_api_key:
+            params['login'] = self.config.danbooru_login
+            params['api_key'] = self.config.danbooru_api_key
+
+        response = self._get(f"{self.base_url}/posts.json", params)
+        try:
+            records = response.json()
+        except ValueError as e:
+            raise BooruAPIError(f"Unparseable danbooru API response: {str(e)}") from e
+        if not isinstance(records, list):
+            raise BooruAPIError(f"Unexpected danbooru API response: {str(records)[:200]}")
+
+        posts = []
+        for record in records:
+            # Posts restricted to higher account levels come back without file_url
+            if not record.get('file_url'):
+                continue
+            try:
+                posts.append(BooruPost(
+                    post_id=int(record['id']),
+                    md5=record.get('md5', ''),
+                    file_url=record['file_url'],
+                    rating=record.get('rating', ''),
+                    tags=record.get('tag_string', '').split(),
+                    site=self.site,
+                    sample_url=record.get('large_file_url') or None,
+                    preview_url=record.get('preview_file_url') or None
+                ))
+            except (KeyError, ValueError) as e:
+                self.logger.debug(f"Skipping malformed danbooru post record: {str(e)}")
+
+        if len(records) < self.limit:
+            return posts, None
+        return posts, f"b{min(int(record['id']) for record in records)}"
+
+    def post_page_url(self, post: BooruPost, tags: str) -> str:
+        return f"{self.base_url}/posts/{post.post_id}?tags={urllib.parse.quote_plus(tags)}"
+
+
+class GelbooruURLResolver:
+    """Derives original file URLs from Gelbooru list page thumbnail data"""
+
+    THUMBNAIL_PATTERN = re.compile(
+        r'/(?:thumbnails|samples)/([0-9a-f]{2})/([0-9a-f]{2})/(?:thumbnail|sample)_([0-9a-f]{32})\.\w+',
+        re.IGNORECASE
+    )
+    VIDEO_TAGS = {'video', 'animated_webm', 'webm', 'mp4', 'sound'}
+    GIF_TAGS = {'animated_gif', 'animated'}
+
+    # Collects every thumbnail on a list page in a single WebDriver round trip
+    THUMBNAIL_SCRIPT = """
+        return Array.from(document.querySelectorAll('article.thumbnail-preview a')).map(function (a) {
+            var img = a.querySelector('img');
+            var data = Object.assign({}, a.dataset, img ? img.dataset : {});
+            return {
+                href: a.href,
+                src: img ? (img.getAttribute('src') || '') : '',
+                title: img ? (img.getAttribute('title') || img.getAttribute('alt') || '') : '',
+                data: data
+            };
+        });
+    """
+
+    def __init__(self, config: ScraperConfig, http: HTTPSessionPool = None, logger: logging.Logger = None):
+        self.config = config
+        self.http = http or HTTPSessionPool(config)
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+
+    def is_video(self, thumbnail: Dict) -> bool:
+        """Whether the thumbnail's tags mark the post as a video we cannot classify"""
+        return bool(self.VIDEO_TAGS & set(thumbnail.get('title', '').split()))
+
+    def candidate_urls(self, thumbnail: Dict) -> List[str]:
+        """Original file URLs the thumbnail could correspond to, most likely first"""
+        src = urljoin(thumbnail.get('href') or 'https://gelbooru.com/', thumbnail.get('src', ''))
+        match = self.THUMBNAIL_PATTERN.search(src)
+        if not match:
+            return []
+
+        shard_a, shard_b, md5 = match.groups()
+        extensions = ['.jpg', '.png', '.jpeg', '.gif', '.webp']
+        if self.GIF_TAGS & set(thumbnail.get('title', '').split()):
+            extensions.remove('.gif')
+            extensions.insert(0, '.gif')
+
+        parsed = urlparse(src)
+        return [f"{parsed.scheme}://{parsed.netloc}/images/{shard_a}/{shard_b}/{md5.lower()}{ext}"
+                for ext in extensions]
+
+    def resolve(self, thumbnail: Dict) -> Optional[str]:
+        """
+        Resolve the full-size URL for a list page thumbnail without opening the post page.
+
+        Args:
+            thumbnail (Dict): href, src, title and data-* values of one list page thumbnail
+
+        Returns:
+            Optional[str]: Original file URL, or None if it could not be inferred
+        """
+        # Some list templates expose the original directly as a data-* attribute
+        for value in thumbnail.get('data', {}).values():
+            if isinstance(value, str) and '/images/' in value:
+                return urljoin(thumbnail.get('href', ''), value)
+
+        headers = {
+            'User-Agent': self.config.user_agent,
+            'Referer': thumbnail.get('href') or 'https://gelbooru.com/'
+        }
+        for candidate in self.candidate_urls(thumbnail):
+            try:
+                response = self.http.head(candidate, rate=self.config.download_rate, headers=headers,
+                                          allow_redirects=True, timeout=self.config.request_timeout)
+                if response.status_code == 200 and response.headers.get('Content-Type', '').startswith('image/'):
+                    return candidate
+            except RequestException as e:
+                self.logger.debug(f"HEAD probe failed for {candidate}: {str(e)}")
+
+        return None
+
+
+class BrowserPool:
+    """Bounded pool of warm Chrome sessions that outlive individual characters"""
+
+    def __init__(self, factory: Callable[[], webdriver.Chrome], max_size: int = 4, max_navigations: int = 500,
+                 max_rss_mb: float = 2048.0, logger: logging.Logger = None):
+        """
+        Args:
+            factory (Callable): Creates a new configured browser
+            max_size (int): Maximum number of live browsers, checked out or idle
+            max_navigations (int): Recycle a browser after this many page loads
+            max_rss_mb (float): Recycle a browser whose process tree exceeds this resident size
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+
+        self._condition = threading.Condition()
+        self._idle: List[webdriver.Chrome] = []
+        self._navigations: Dict[int, int] = {}
+        self._size = 0
+        self._closed = False
+        self.created_total = 0
+        self.recycled_total = 0
+
+    def _create(self) -> webdriver.Chrome:
+        """Launch a browser outside the pool lock so launches can run in parallel"""
+        browser = self.factory()
+        with self._condition:
+            self._navigations[id(browser)] = 0
+            self.created_total += 1
+        return browser
+
+    def _reserve_slot(self) -> bool:
+        """Claim capacity for a new browser, returns False if the pool is full"""
+        with self._condition:
+            if self._closed or self._size >= self.max_size:
+                return False
+            self._size += 1
+            return True
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def warm_up(self, count: int = None) -> int:
+        """Launch up to count browsers concurrently and park them as idle, returns the number started"""
+        count = self.max_size if count is None else count
+        reserved = 0
+        while reserved < count and self._reserve_slot():
+            reserved += 1
+        if not reserved:
+            return 0
+
+        self.logger.info(f"Warming up {reserved} browsers")
+        started = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=reserved,
+                                                   thread_name_prefix="browser-warmup") as executor:
+            futures = [executor.submit(self._create) for _ in range(reserved)]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    browser = future.result()
+                    with self._condition:
+                        self._idle.append(browser)
+                        self._condition.notify()
+                    started += 1
+                except Exception as e:
+                    self.logger.error(f"Failed to warm up browser: {str(e)}")
+                    self._release_slot()
+
+        return started
+
+    def checkout(self, timeout: float = None) -> webdriver.Chrome:
+        """Take a healthy idle browser, launching a new one if the pool has spare capacity"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            browser = None
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a pooled browser")
+                    self._condition.wait(remaining)
+
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    browser = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if browser is None:
+                try:
+                    return self._create()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if self.is_healthy(browser):
+                return browser
+
+            self.logger.warning("Discarding unhealthy pooled browser")
+            self.discard(browser)
+
+    def checkin(self, browser: webdriver.Chrome) -> None:
+        """Return a browser to the pool, recycling it if it is worn out or unhealthy"""
+        with self._condition:
+            closed = self._closed
+            navigations = self._navigations.get(id(browser), 0)
+
+        reason = None
+        if closed:
+            reason = "pool closed"
+        elif navigations >= self.max_navigations:
+            reason = f"{navigations} navigations"
+        elif not self.is_healthy(browser):
+            reason = "failed health probe"
+        else:
+            rss_mb = self.rss_mb(browser)
+            if rss_mb > self.max_rss_mb:
+                reason = f"RSS {rss_mb:.0f} MB"
+
+        if reason:
+            self.logger.info(f"Recycling browser ({reason})")
+            with self._condition:
+                self.recycled_total += 1
+            self.discard(browser)
+            return
+
+        with self._condition:
+            self._idle.append(browser)
+            self._condition.notify()
+
+    def discard(self, browser: webdriver.Chrome) -> None:
+        """Quit a browser and free its slot"""
+        try:
+            browser.quit()
+        except Exception as e:
+            self.logger.debug(f"Error quitting browser: {str(e)}")
+        with self._condition:
+            self._navigations.pop(id(browser), None)
+            self._size -= 1
+            self._condition.notify()
+
+    def record_navigation(self, browser: webdriver.Chrome) -> None:
+        with self._condition:
+            self._navigations[id(browser)] = self._navigations.get(id(browser), 0) + 1
+
+    @staticmethod
+    def is_healthy(browser: webdriver.Chrome) -> bool:
+        """Cheap liveness probe: the session has a window and can run script"""
+        try:
+            return bool(browser.window_handles) and browser.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def rss_mb(browser: webdriver.Chrome) -> float:
+        """Resident memory of the chromedriver process tree in MB"""
+        try:
+            driver_process = psutil.Process(browser.service.process.pid)
+            processes = [driver_process] + driver_process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running()) / 1024 / 1024
+        except Exception:
+            return 0.0
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                'live': self._size,
+                'idle': len(self._idle),
+                'created_total': self.created_total,
+                'recycled_total': self.recycled_total
+            }
+
+    def close(self) -> None:
+        """Quit idle browsers; browsers still checked out are quit when returned"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for browser in idle:
+            self.discard(browser)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of wait times"""
+
+    BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        elapsed_ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if elapsed_ms <= bound), len(self.BUCKETS_MS))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bucket bound containing the given fraction of samples"""
+        with self._lock:
+            target = fraction * self.count
+            seen = 0
+            for i, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if bucket_count and seen >= target:
+                    return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+            buckets = {f"<={bound}ms": c for bound, c in zip(self.BUCKETS_MS, self._counts)}
+            buckets[f">{self.BUCKETS_MS[-1]}ms"] = self._counts[-1]
+        return {
+            'count': count,
+            'total_s': round(total_ms / 1000, 2),
+            'mean_ms': round(total_ms / count, 1) if count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(max_ms, 1),
+            'buckets': buckets
+        }
+
+
+@dataclass
+class PageReadiness:
+    """Declares when a page's data is available, as a CSS selector and/or a JS predicate body"""
+    selector: Optional[str] = None
+    script: Optional[str] = None
+    timeout: float = 10.0
+
+    def to_script(self) -> str:
+        """Combine selector and predicate into one script so each poll is a single WebDriver call"""
+        checks = []
+        if self.selector:
+            checks.append(f"document.querySelector({json.dumps(self.selector)}) !== null")
+        if self.script:
+            checks.append(f"(function () {{ {self.script} }})()")
+        return f"return {' && '.join(checks) if checks else 'true'};"
+
+
+@dataclass
+class SiteProfile:
+    """Browser behaviour declared by each site scraper"""
+    name: str
+    list_ready: PageReadiness
+    post_ready: PageReadiness
+    dom_only: bool = True  # Skip images, stylesheets, fonts, media and ad/analytics requests
+    blocked_url_patterns: List[str] = field(default_factory=list)
+    original_url_marker: str = '/images/'  # Path fragment identifying full-size files in network traffic
+
+
+# Requests a DOM-only session never needs; the originals are downloaded separately
+DOM_ONLY_BLOCKED_URLS = [
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*adservice.google.*', '*exoclick.com*', '*exosrv.com*', '*juicyads.com*', '*trafficjunky.*',
+    '*adsterra*', '*popads.net*', '*magsrv.com*', '*realsrv.com*', '*cloudflareinsights.com*',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg'
+]
+
+# With network capture on, images must still be requested so the URL shows up in the
+# DevTools events; blocking them at the network layer keeps the bytes off the wire
+CAPTURE_BLOCKED_IMAGE_URLS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp']
+
+
+class PageCostStats:
+    """Thread-safe running totals of bytes transferred per page load"""
+
+    # Reads transfer sizes from the Resource Timing API in a single round trip. Cross-origin
+    # resources without Timing-Allow-Origin report 0, so this is a lower bound.
+    SCRIPT = """
+        var nav = performance.getEntriesByType('navigation')[0];
+        var bytes = nav ? nav.transferSize : 0;
+        performance.getEntriesByType('resource').forEach(function (r) { bytes += r.transferSize || 0; });
+        return {bytes: bytes, load_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : 0};
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.total_bytes = 0
+
+    def record(self, transferred_bytes: int) -> None:
+        with self._lock:
+            self.pages += 1
+            self.total_bytes += transferred_bytes
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'profile': self.label,
+                'pages': self.pages,
+                'total_mb': round(self.total_bytes / 1024 / 1024, 2),
+                'avg_kb_per_page': round(self.total_bytes / self.pages / 1024, 1) if self.pages else 0.0
+            }
+
+
+from abc import ABC, abstractmethod
+import logging
+from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from pathlib import Path
+import time
+
+
+@dataclass
+class ScraperState:
+    """Thread-safe state tracking for scraper"""
+    active_characters: Set[str] = field(default_factory=set)
+    completed_characters: Set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    browser_lock: threading.Lock = field(default_factory=threading.Lock)
+    logger: logging.Logger = field(default=None)
+
+    def __post_init__(self):
+        """Initialize logger after creation"""
+        self.logger = logging.getLogger(__name__)
+
+    def is_character_available(self, character: str) -> bool:
+        """Check if character is available for processing"""
+        self.logger.debug(f"Checking availability for {character}")
+        with self.lock:
+            is_available = character not in self.active_characters and character not in self.completed_characters
+            self.logger.debug(f"{character} availability: {is_available}")
+            return is_available
+
+    def start_character(self, character: str) -> bool:
+        """Mark character as being processed"""
+        self.logger.debug(f"Attempting to start {character}")
+        try:
+            with self.lock:
+                if character not in self.active_characters and character not in self.completed_characters:
+                    self.active_characters.add(character)
+                    self.logger.debug(f"Successfully started {character}")
+                    return True
+                self.logger.debug(f"Could not start {character} - already active or completed")
+                return False
+        except Exception as e:
+            self.logger.error(f"Error starting {character}: {str(e)}")
+            return False
+
+    def complete_character(self, character: str) -> None:
+        """Mark character as completed"""
+        self.logger.debug(f"Attempting to complete {character}")
+        try:
+            with self.lock:
+                if character in self.active_characters:
+                    self.active_characters.remove(character)
+                    self.completed_characters.add(character)
+                    self.logger.debug(f"Successfully completed {character}")
+        except Exception as e:
+            self.logger.error(f"Error completing {character}: {str(e)}")
+
+
+class PageOutcome(Enum):
+    """What a character should do after one of its list pages has been handled"""
+    MORE = 'more'  # List the next page of the same URL
+    URL_DONE = 'url_done'  # Move on to the character's next URL
+    SKIP_CHARACTER = 'skip_character'  # Abandon the character, leaving its checkpoint incomplete
+
+
+@dataclass
+class PageTask:
+    """One list page of one character's search URL, the unit of work for the page scheduler"""
+    character: str
+    urls: List[str]
+    url_index: int
+    max_pages: int
+    mode: str = 'api'
+    page_num: int = 0
+    cursor: Optional[Union[int, str]] = None
+    tags: Optional[str] = None
+    high_water: Optional[int] = None
+    newest_seen: Optional[int] = None
+    pages_listed: int = 0
+    priority: int = 0
+    skipped: bool = False  # Abandoned on SKIP_CHARACTER rather than finished
+
+    @property
+    def base_url(self) -> str:
+        return self.urls[self.url_index]
+
+
+class PageScheduler:
+    """
+    Shared queue of list pages worked by a fixed set of threads.
+
+    run_task lists one page and returns the task that follows it for the same character, or
+    None when the character is done. Pending tasks are taken lowest priority first and in
+    arrival order within a priority, and follow-ups keep their character's priority and go
+    behind its peers, so pages of one character stay in order while workers interleave every
+    character and stay busy until the queue is empty.
+    """
+
+    def __init__(self, run_task: Callable[[PageTask], Optional[PageTask]], workers: int,
+                 thread_name_prefix: str = 'scraper', logger: logging.Logger = None):
+        self.run_task = run_task
+        self.workers = workers
+        self.thread_name_prefix = thread_name_prefix
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._pending: List[Tuple[int, int, PageTask]] = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._threads: List[threading.Thread] = []
+        self._live_workers = 0
+        self._spawned = 0
+        self._finished = False
+        self._stopped = False
+        self.target_workers = workers
+        self.pages_run = 0
+
+    def run(self, tasks: Iterable[PageTask]) -> None:
+        """Work through tasks and everything they lead to, returning once all workers are idle"""
+        with self._cond:
+            for task in tasks:
+                self._push(task)
+            self._finished = False
+        self.set_workers(self.target_workers)
+
+        # Workers may be added while running, so keep joining until none are left
+        while True:
+            with self._cond:
+                alive = [thread for thread in self._threads if thread.is_alive()]
+                self._threads = alive
+            if not alive:
+                break
+            alive[0].join()
+        self.logger.info(f"Page scheduler finished after {self.pages_run} pages")
+
+    def set_workers(self, workers: int) -> None:
+        """Grow the pool now, or let surplus workers retire after their current page"""
+        with self._cond:
+            self.target_workers = workers
+            self._cond.notify_all()
+            if self._finished:
+                return
+            new_threads = []
+            while self._live_workers < workers:
+                self._live_workers += 1
+                self._spawned += 1
+                thread = threading.Thread(target=self._worker, name=f"{self.thread_name_prefix}_{self._spawned}",
+                                          daemon=True)
+                self._threads.append(thread)
+                new_threads.append(thread)
+        for thread in new_threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Hand out no more tasks; workers exit once their current page is done"""
+        with self._cond:
+            self._stopped = True
+            self._finished = True
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[PageTask]:
+        with self._cond:
+            # A running task may still queue a follow-up, so only stop once nothing is in flight
+            while not self._pending and self._in_flight and not self._stopped:
+                self._cond.wait()
+            if not self._pending or self._stopped:
+                self._finished = True
+                self._live_workers -= 1
+                return None
+            if self._live_workers > self.target_workers:
+                self._live_workers -= 1
+                return None
+            self._in_flight += 1
+            return heapq.heappop(self._pending)[2]
+
+    def _push(self, task: PageTask) -> None:
+        # Caller holds self._cond
+        self._seq += 1
+        heapq.heappush(self._pending, (task.priority, self._seq, task))
+
+    def _worker(self) -> None:
+        while True:
+            task = self._next()
+            if task is None:
+                return
+
+            next_task = None
+            try:
+                next_task = self.run_task(task)
+            except Exception as e:
+                self.logger.error(f"Error listing page {task.page_num + 1} for {task.character}: {str(e)}")
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self.pages_run += 1
+                    if next_task is not None:
+                        self._push(next_task)
+                    self._cond.notify_all()
+
+
+class AdaptiveWorkerController:
+    """
+    Resizes the listing, download and classification pools while a run is in progress.
+
+    Every interval it reads the download stage's throughput, failures and fetch latency,
+    new 429s from the host rate limiter, and system CPU and process-tree RSS through psutil.
+    Downloads halve on 429s or a high error rate and grow while jobs are backed up and latency
+    holds. Classification grows while finished downloads wait for a worker. Listing shrinks
+    when the download queue is nearly full and grows when it runs dry. Everything shrinks by
+    one under CPU or memory pressure.
+    """
+
+    ERROR_RATE_LIMIT = 0.2
+    LATENCY_SLACK = 1.5
+
+    def __init__(self, config: ScraperConfig, engine: Optional[AsyncDownloadEngine], rate_limiter: HostRateLimiter,
+                 scheduler: Optional[PageScheduler] = None, logger: logging.Logger = None):
+        self.config = config
+        self.engine = engine
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last: Optional[Dict[str, float]] = None
+        self._best_latency: Optional[float] = None
+
+    def start(self) -> None:
+        psutil.cpu_percent(interval=None)  # Prime the counter so the first sample covers one interval
+        self._thread = threading.Thread(target=self._run, name='worker-controller', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.config.adapt_interval):
+            try:
+                self._adjust()
+            except Exception as e:
+                self.logger.error(f"Worker controller error: {str(e)}")
+
+    def _rss_mb(self) -> float:
+        """Resident memory of this process plus its children, which include the Chrome processes"""
+        rss = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss / 1024 / 1024
+
+    def _sample(self) -> Dict[str, float]:
+        stats = dict(self.engine.stats) if self.engine is not None else {}
+        return {
+            'done': stats.get('fetched', 0) + stats.get('failed', 0),
+            'failed': stats.get('failed', 0),
+            'fetch_seconds': stats.get('fetch_seconds', 0.0),
+            'penalties': sum(host['penalties'] for host in self.rate_limiter.stats().values()),
+        }
+
+    def _adjust(self) -> None:
+        sample = self._sample()
+        last, self._last = self._last, sample
+        if last is None:
+            return
+
+        done = sample['done'] - last['done']
+        error_rate = (sample['failed'] - last['failed']) / done if done else 0.0
+        latency = (sample['fetch_seconds'] - last['fetch_seconds']) / done if done else None
+        if latency is not None:
+            self._best_latency = latency if self._best_latency is None else min(self._best_latency, latency)
+        throttled = sample['penalties'] > last['penalties']
+        cpu = psutil.cpu_percent(interval=None)
+        rss_mb = self._rss_mb()
+        pressure = cpu > self.config.cpu_limit_percent or rss_mb > self.config.rss_limit_mb
+        latency_ok = latency is None or latency <= self._best_latency * self.LATENCY_SLACK
+
+        if self.engine is not None:
+            backlog = self.engine.pending()
+            downloads = self.engine.concurrency
+            if throttled or error_rate > self.ERROR_RATE_LIMIT:
+                downloads //= 2
+            elif pressure:
+                downloads -= 1
+            elif backlog > downloads and latency_ok:
+                downloads += 1
+            self._resize('downloads', self.engine.concurrency, downloads,
+                         self.config.max_download_concurrency, self.engine.set_concurrency)
+
+            classifiers = self.engine.classify_limit.limit
+            if pressure:
+                classifiers -= 1
+            elif self.engine.classify_limit.waiting:
+                classifiers += 1
+            self._resize('classification', self.engine.classify_limit.limit, classifiers,
+                         self.config.max_classification_workers, self.engine.classify_limit.set_limit)
+
+        if self.scheduler is not None:
+            listers = self.scheduler.target_workers
+            queue_fill = self.engine.pending() / self.config.download_queue_size if self.engine is not None else 0.0
+            if pressure or queue_fill >= 0.9:
+                listers -= 1
+            elif queue_fill < 0.25 and not throttled:
+                listers += 1
+            # Any lister can fall back to the browser walk, so never run more than there are browsers
+            max_listers = min(self.config.max_list_workers, self.config.browser_pool_size)
+            self._resize('listing', self.scheduler.target_workers, listers, max_listers, self.scheduler.set_workers)
+
+        self.logger.debug(f"Worker controller sample: cpu={cpu:.0f}% rss={rss_mb:.0f}MB "
+                          f"error_rate={error_rate:.2f} latency={latency} throttled={throttled}")
+
+    def _resize(self, pool: str, current: int, wanted: int, maximum: int, apply: Callable[[int], None]) -> None:
+        wanted = max(1, min(maximum, wanted))
+        if wanted != current:
+            self.logger.info(f"Resizing {pool} workers {current} -> {wanted}")
+            apply(wanted)
+
+
+class HentaiScraper(ABC):
+    """Enhanced abstract base class for scrapers with threading support"""
+
+    # Page readiness and browser behaviour for the site, declared by each subclass
+    SITE_PROFILE: SiteProfile = None
+
+    def __init__(self, config: ScraperConfig):
+        """Initialize the scraper with configuration"""
+        self.config = config
+        self.state = ScraperState()
+        self.thread_local = threading.local()
+        self.stop_requested = threading.Event()
+        self._setup_logging()
+
+    def _setup_logging(self):
+        """Configure logging with thread information"""
+        log_format = '%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s'
+        log_level = logging.DEBUG if self.config.verbose_logging else logging.INFO
+
+        # Create a unique log file for each scraper class
+        log_file = Path(f'{self.__class__.__name__.lower()}.log')
+
+        # Configure root logger
+        logging.basicConfig(
+            level=log_level,
+            format=log_format,
+            handlers=[
+                logging.FileHandler(log_file),
+                logging.StreamHandler()
+            ]
+        )
+
+        # Create logger specific to this instance
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @abstractmethod
+    def setup(self) -> bool:
+        """
+        Setup scraper-specific requirements
+
+        Returns:
+            bool: True if setup was successful, False otherwise
+        """
+        pass
+
+    def process_character(self, character: str, urls: List[str], max_pages: int = 380) -> None:
+        """
+        Process a single character's URLs page by page on the calling thread
+
+        Args:
+            character (str): Character name being processed
+            urls (List[str]): List of URLs to process for this character
+            max_pages (int): Maximum number of pages to process per URL
+        """
+        thread = threading.current_thread()
+        self.logger.info(f"Thread {thread.name} processing {character}")
+
+        task = self._first_task(character, urls, max_pages)
+        while task is not None and not self.stop_requested.is_set():
+            task = self._run_page_task(task)
+
+    def _process_urls_by_page(self, urls: Dict[str, Union[str, List[str]]], max_pages: int) -> None:
+        """
+        Scrape every character through one shared queue of list pages.
+
+        A worker lists a single page and queues that character's next page behind everyone
+        else's, so a 380 page character no longer pins a thread while the rest sit idle.
+        Posts fan out to the download stage as soon as their page is listed.
+        """
+        workers = self.config.list_workers
+        self.logger.info(f"Starting page-level scraping of {len(urls)} characters with {workers} workers")
+
+        # Launch browsers up front and in parallel when every page goes through Selenium
+        if self.config.listing_mode == 'browser':
+            self.browser_pool.warm_up(min(workers, len(urls)))
+
+        priorities = self._character_priorities(urls)
+        tasks = []
+        for character, url_list in urls.items():
+            if not self.state.start_character(character):
+                self.logger.warning(f"Could not acquire lock for {character}")
+                continue
+            task = self._first_task(character, url_list, max_pages)
+            if task is None:
+                self.state.complete_character(character)
+            else:
+                task.priority = priorities[character]
+                tasks.append(task)
+
+        def run(task: PageTask) -> Optional[PageTask]:
+            next_task = self._run_page_task(task)
+            if next_task is None:
+                # Either way it is done for this run; only a finished character's checkpoint says so
+                self.state.complete_character(task.character)
+                if task.skipped:
+                    self.logger.info(f"Skipped {task.character} before finishing its URLs")
+                else:
+                    self.logger.info(f"Completed processing {task.character}")
+            return next_task
+
+        scheduler = PageScheduler(run, workers, logger=self.logger)
+        self.page_scheduler = scheduler
+        controller = self._start_worker_controller(scheduler)
+        try:
+            scheduler.run(tasks)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        finally:
+            if controller is not None:
+                controller.stop()
+
+        # Wait for files still queued in the download stage
+        if self.download_engine is not None:
+            self.download_engine.join()
+        self._flush_high_water_marks()
+
+        self.logger.info("All characters processed")
+
+    def _start_worker_controller(self, scheduler: PageScheduler = None) -> Optional[AdaptiveWorkerController]:
+        """Start resizing worker pools from live measurements, if enabled"""
+        if not self.config.adaptive_workers:
+            return None
+        controller = AdaptiveWorkerController(self.config, self.download_engine, self.http.rate_limiter,
+                                              scheduler=scheduler, logger=self.logger)
+        controller.start()
+        return controller
+
+    def _new_task(self, character: str, urls: List[str], url_index: int, max_pages: int, page_num: int = 0,
+                  cursor: Union[int, str] = None) -> PageTask:
+        self.logger.info(f"Processing URL {url_index + 1}/{len(urls)} for {character}: {urls[url_index]}")
+        return PageTask(character=character, urls=urls, url_index=url_index, max_pages=max_pages,
+                        mode=self.config.listing_mode, page_num=page_num, cursor=cursor)
+
+    def _first_task(self, character: str, urls: Union[str, List[str]], max_pages: int) -> Optional[PageTask]:
+        """Task for a character's first page, or the checkpointed one when resuming"""
+        urls = [urls] if isinstance(urls, str) else list(urls)
+        if not urls:
+            return None
+
+        resume = self._resume_point(character, urls)
+        if resume and resume['completed']:
+            self.logger.info(f"Skipping {character}, already completed before the interruption")
+            return None
+        if resume:
+            self.logger.info(f"Resuming {character} at page {resume['page_num'] + 1}")
+            return self._new_task(character, urls, resume['url_index'], max_pages,
+                                  resume['page_num'], resume['cursor'])
+        return self._new_task(character, urls, 0, max_pages)
+
+    def _run_page_task(self, task: PageTask) -> Optional[PageTask]:
+        """
+        List one page of a character's search.
+
+        Returns:
+            Optional[PageTask]: The character's next page or URL, or None once it is finished
+        """
+        try:
+            if task.mode == 'api':
+                try:
+                    outcome = self._list_api_page(task)
+                except BooruAPIError as e:
+                    if task.pages_listed == 0:
+                        self.logger.warning(f"API listing unavailable for {task.character}, "
+                                            f"falling back to browser: {str(e)}")
+                        # Browser checkpoints carry no cursor, and API page numbers don't map onto list pages
+                        task.mode = 'browser'
+                        task.page_num = task.page_num if task.cursor is None else 0
+                        task.cursor = None
+                        return task
+
+                    # Leave the mark alone so the next run walks back over the pages missed here
+                    self.logger.error(f"API listing for {task.character} stopped after "
+                                      f"{task.pages_listed} pages: {str(e)}")
+                    task.newest_seen = None
+                    outcome = PageOutcome.URL_DONE
+            else:
+                # Hold a browser for this page only, so idle workers never pin one and checkin can recycle it
+                try:
+                    outcome = self._list_browser_page(task)
+                finally:
+                    try:
+                        self._release_thread_browser()
+                    except Exception as e:
+                        self.logger.error(f"Error returning browser for {task.character}: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"Error processing URL {task.base_url} for {task.character}: {str(e)}")
+            outcome = PageOutcome.URL_DONE
+
+        if outcome is PageOutcome.MORE and task.page_num + 1 < task.max_pages:
+            task.page_num += 1
+            return task
+        if outcome is PageOutcome.SKIP_CHARACTER:
+            task.skipped = True
+            return None
+        return self._finish_url(task)
+
+    def _finish_url(self, task: PageTask) -> Optional[PageTask]:
+        """Wrap up a finished URL and return the task for the character's next one"""
+        if task.mode == 'api':
+            if task.pages_listed == 0:
+                self.logger.info(f"No posts found for {task.character} at {task.base_url}")
+            elif task.newest_seen and self._is_incremental(task.tags):
+                self._set_high_water_mark(task.tags, task.newest_seen)
+
+        if task.url_index + 1 < len(task.urls):
+            next_task = self._new_task(task.character, task.urls, task.url_index + 1, task.max_pages)
+            next_task.priority = task.priority
+            return next_task
+
+        self._save_checkpoint(task.character, len(task.urls), completed=True)
+        return None
+
+    def _list_api_page(self, task: PageTask) -> PageOutcome:
+        """
+        List one page through the site API client and download every post on it.
+
+        Raises:
+            BooruAPIError: If the request fails, so the caller can fall back to the browser
+                walk when nothing has been listed yet
+        """
+        character = task.character
+        if task.tags is None:
+            task.tags = self.api_client.tags_from_url(task.base_url)
+            if not task.tags:
+                raise BooruAPIError(f"No tags found in {task.base_url}")
+            task.high_water = self._get_high_water_mark(task.tags) if self._is_incremental(task.tags) else None
+
+        cursor = self.api_client.initial_cursor() if task.cursor is None else task.cursor
+        posts, next_cursor = self.api_client.fetch_page(task.tags, cursor)
+        task.cursor = next_cursor
+
+        if posts:
+            task.pages_listed += 1
+            self.logger.info(f"Found {len(posts)} posts for {character} on API page {task.page_num + 1}")
+
+            page_ids = [post.post_id for post in posts]
+            task.newest_seen = max([task.newest_seen or 0] + page_ids)
+            if task.high_water is not None and max(page_ids) <= task.high_water:
+                self.logger.info(f"Page {task.page_num + 1} for {character} holds only posts up to "
+                                 f"{task.high_water} from a previous run, stopping")
+                return PageOutcome.URL_DONE
+
+            for img_index, post in enumerate(posts, 1):
+                try:
+                    if not post.is_image:
+                        self.logger.debug(f"Skipping non-image post {post.post_id} ({post.extension})")
+                        continue
+
+                    source_page = self.api_client.post_page_url(post, task.tags)
+                    if self._submit_download(post.file_url, source_page, post=post, character=character):
+                        self.logger.debug(f"Handed off image {img_index} for {character}")
+                    else:
+                        self.logger.warning(f"Failed to download image {img_index} for {character}")
+
+                except Exception as e:
+                    self.logger.error(f"Error processing post {post.post_id} for {character}: {str(e)}")
+                    continue
+
+            self._save_checkpoint(character, task.url_index, task.base_url, task.page_num, cursor)
+
+            # Results are newest first, so once the mark is crossed every later page is known
+            if task.high_water is not None and min(page_ids) <= task.high_water:
+                self.logger.info(f"Caught up with previous crawl of {character} at post {task.high_water}")
+                return PageOutcome.URL_DONE
+
+        return PageOutcome.URL_DONE if next_cursor is None else PageOutcome.MORE
+
+    @abstractmethod
+    def _list_browser_page(self, task: PageTask) -> PageOutcome:
+        """List one search page with Selenium and hand its images to the download stage"""
+        pass
+
+    def process_urls(self, urls: Dict[str, Union[str, List[str]]], max_pages: int = 380):
+        """Scrape every character, by shared page queue or one character per worker depending on config"""
+        # System diagnostics
+        process = psutil.Process()
+        self.logger.info(f"Total characters to process: {len(urls)}")
+        self.logger.info(f"Current memory usage: {process.memory_info().rss / 1024 / 1024:.2f} MB")
+        self.logger.info(f"Current thread count: {threading.active_count()}")
+
+        try:
+            if self.config.scheduling == 'page':
+                self._process_urls_by_page(urls, max_pages)
+            else:
+                self._process_urls_by_character(urls, max_pages)
+        except Exception as e:
+            self.logger.error(f"Error in process_urls: {str(e)}")
+            self.logger.exception("Error traceback:")
+            raise
+
+    def _character_priorities(self, characters: Iterable[str]) -> Dict[str, int]:
+        """Dispatch priority per character, lower first; fewest_files favours characters we have least of"""
+        if self.config.dispatch_priority != 'fewest_files':
+            return {character: 0 for character in characters}
+
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        try:
+            counts = dict(conn.execute('''
+                SELECT c.name, COUNT(f.id) FROM characters c
+                LEFT JOIN files f ON f.character_id = c.id
+                GROUP BY c.name
+            ''').fetchall())
+        finally:
+            conn.close()
+        return {character: counts.get(character, 0) for character in characters}
+
+    def _process_urls_by_character(self, urls: Dict[str, Union[str, List[str]]], max_pages: int) -> None:
+        """
+        Scrape characters on a rolling pool of list_workers threads, one character per thread.
+
+        Pending characters sit in a heap ordered by priority, and after every completion the
+        pool is topped back up to its full size, skipping characters that can't be started.
+        """
+        workers = self.config.list_workers
+        self.logger.info(f"Starting scraping with {workers} concurrent scrapers")
+
+        # Launch browsers up front and in parallel when every page goes through Selenium
+        if self.config.listing_mode == 'browser':
+            self.browser_pool.warm_up(min(workers, len(urls)))
+
+        priorities = self._character_priorities(urls)
+        pending = [(priorities[character], index, character) for index, character in enumerate(urls)]
+        heapq.heapify(pending)
+
+        controller = self._start_worker_controller()
+        active_futures: Dict[concurrent.futures.Future, str] = {}
+        completed_count = 0
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                         thread_name_prefix=self.site_name or "scraper")
+        try:
+            while pending or active_futures:
+                # Keep every worker busy; a character that can't start doesn't cost a slot
+                while pending and len(active_futures) < workers and not self.stop_requested.is_set():
+                    _, _, character = heapq.heappop(pending)
+                    if not self.state.start_character(character):
+                        self.logger.warning(f"Could not acquire lock for {character}")
+                        continue
+                    url_list = urls[character]
+                    url_list = [url_list] if isinstance(url_list, str) else url_list
+                    future = executor.submit(self._process_character_wrapper, character, url_list, max_pages)
+                    active_futures[future] = character
+                    self.logger.info(f"Task submitted for {character}")
+
+                if not active_futures:
+                    break
+
+                done, _ = concurrent.futures.wait(active_futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    character = active_futures.pop(future)
+                    try:
+                        future.result()
+                        completed_count += 1
+                        self.logger.info(f"Completed processing {character} ({completed_count}/{len(urls)})")
+                    except Exception as e:
+                        self.logger.error(f"Error processing {character}: {str(e)}")
+                    finally:
+                        self.state.complete_character(character)
+
+            # Wait for files still queued in the download stage
+            if self.download_engine is not None:
+                self.download_engine.join()
+            self._flush_high_water_marks()
+
+            self.logger.info("All characters processed")
+
+        except KeyboardInterrupt:
+            # Let running characters stop after their current page instead of waiting them out
+            self.stop()
+            raise
+        finally:
+            if controller is not None:
+                controller.stop()
+            self.logger.info("Shutting down executor")
+            executor.shutdown(wait=True)
+            self.logger.info("Executor shutdown complete")
+
+    def stop(self) -> None:
+        """Stop listing new pages, e.g. on Ctrl-C; pages being listed finish and keep their checkpoints"""
+        self.stop_requested.set()
+        scheduler = getattr(self, 'page_scheduler', None)
+        if scheduler is not None:
+            scheduler.stop()
+
+    def _process_character_wrapper(self, character: str, urls: List[str], max_pages: int) -> None:
+        """Wrapper for process_character with error handling"""
+        thread = threading.current_thread()
+        self.logger.info(f"Thread {thread.name} starting {character}")
+
+        try:
+            result = self.process_character(character, urls, max_pages)
+            self.logger.info(f"Thread {thread.name} completed {character}")
+            return result
+        except Exception as e:
+            self.logger.error(f"Thread {thread.name} error processing {character}: {str(e)}")
+            self.logger.exception("Error traceback:")
+            raise
+
+    def _get_thread_browser(self) -> webdriver.Chrome:
+        """Get the browser checked out by the current thread, checking one out of the pool if needed"""
+        if not hasattr(self.thread_local, 'browser'):
+            self.logger.debug(f"Checking out browser for thread {threading.current_thread().name}")
+            self.thread_local.browser = self.browser_pool.checkout()
+
+        return self.thread_local.browser
+
+    def _release_thread_browser(self, discard: bool = False) -> None:
+        """Return the current thread's browser to the pool, or quit it if discard is set"""
+        browser = getattr(self.thread_local, 'browser', None)
+        if browser is None:
+            return
+
+        delattr(self.thread_local, 'browser')
+        if discard:
+            self.browser_pool.discard(browser)
+        else:
+            self.browser_pool.checkin(browser)
+
+    @property
+    def dom_only(self) -> bool:
+        """Whether browsers for this site load the DOM only"""
+        return self.config.dom_only_browsing and self.SITE_PROFILE.dom_only
+
+    def _apply_dom_only_options(self, options: webdriver.ChromeOptions) -> None:
+        """Disable image decoding and media fetches at the Chrome profile level"""
+        if self.config.capture_network_urls:
+            # Chrome's performance log carries the DevTools Network.* events
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+        if not self.dom_only:
+            return
+
+        options.add_argument('--autoplay-policy=user-gesture-required')
+        if self.config.capture_network_urls:
+            # Images stay enabled so they are requested; _apply_dom_only_blocking drops them
+            return
+
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+            'profile.managed_default_content_settings.plugins': 2
+        })
+
+    def _apply_dom_only_blocking(self, browser: webdriver.Chrome) -> None:
+        """Block stylesheets, fonts, media and ad/analytics hosts through CDP"""
+        if not self.dom_only:
+            return
+
+        blocked = DOM_ONLY_BLOCKED_URLS + self.SITE_PROFILE.blocked_url_patterns
+        if self.config.capture_network_urls:
+            blocked = blocked + CAPTURE_BLOCKED_IMAGE_URLS
+
+        try:
+            browser.execute_cdp_cmd('Network.enable', {})
+            browser.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked})
+        except Exception as e:
+            self.logger.warning(f"Could not enable CDP URL blocking: {str(e)}")
+
+    def _harvest_image_urls(self, browser: webdriver.Chrome) -> List[str]:
+        """
+        Drain the performance log and return original file URLs seen in network events.
+
+        Blocked requests still emit Network.requestWillBeSent, so URLs are found even
+        when the bytes are never fetched; Network.responseReceived covers the rest.
+        """
+        marker = self.SITE_PROFILE.original_url_marker
+        urls = []
+        for entry in browser.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+                if message['method'] == 'Network.requestWillBeSent':
+                    url = message['params']['request']['url']
+                elif message['method'] == 'Network.responseReceived':
+                    url = message['params']['response']['url']
+                else:
+                    continue
+            except (KeyError, ValueError):
+                continue
+
+            if marker in urlparse(url).path and url not in urls:
+                urls.append(url)
+
+        return urls
+
+    def _wait_for_network_image(self, browser: webdriver.Chrome, timeout: float) -> Optional[str]:
+        """Poll the performance log until an original file URL is requested"""
+        started = time.monotonic()
+        try:
+            while time.monotonic() - started < timeout:
+                urls = self._harvest_image_urls(browser)
+                if urls:
+                    return urls[-1]
+                time.sleep(0.1)
+            return None
+        finally:
+            self.wait_metrics['image_expand'].record(time.monotonic() - started)
+
+    def _record_page_cost(self, browser: webdriver.Chrome) -> None:
+        """Record bytes transferred and DOMContentLoaded time for the page just loaded"""
+        if not self.config.measure_page_cost:
+            return
+
+        try:
+            cost = browser.execute_script(PageCostStats.SCRIPT)
+            self.page_cost.record(int(cost.get('bytes') or 0))
+            self.wait_metrics['dom_content_loaded'].record(max(float(cost.get('load_ms') or 0), 0.0) / 1000)
+        except Exception as e:
+            self.logger.debug(f"Could not read page cost: {str(e)}")
+
+    def _safe_navigate(self, url: str, readiness: PageReadiness = None, max_retries: int = 3) -> bool:
+        """
+        Navigate to a URL with retries, returning as soon as the page's readiness predicate holds
+
+        Args:
+            url (str): Page to load
+            readiness (PageReadiness, optional): Defaults to the site's list page readiness
+            max_retries (int): Navigation attempts before giving up
+        """
+        readiness = readiness or self.SITE_PROFILE.list_ready
+        browser = self._get_thread_browser()
+        self.logger.debug(f"Navigating to {url}")
+
+        for attempt in range(max_retries):
+            try:
+                self.http.rate_limiter.acquire(url, self.config.listing_rate)
+                self.browser_pool.record_navigation(browser)
+                if self.config.capture_network_urls:
+                    # Drop events from earlier pages so only this page's requests are harvested
+                    browser.get_log('performance')
+
+                started = time.monotonic()
+                browser.get(url)
+                self.wait_metrics['navigate'].record(time.monotonic() - started)
+
+                self._wait_until_ready(browser, readiness)
+                self._record_page_cost(browser)
+                return True
+
+            except Exception as e:
+                self.logger.warning(f"Navigation attempt {attempt + 1} failed: {str(e)}")
+                if attempt == max_retries - 1:
+                    self.logger.error(f"Failed to navigate to {url} after {max_retries} attempts")
+                    return False
+                time.sleep(2 * (attempt + 1))
+
+                # Try a fresh browser on the last attempt
+                if attempt == max_retries - 2:
+                    try:
+                        self._release_thread_browser(discard=True)
+                        browser = self._get_thread_browser()
+                    except Exception as refresh_error:
+                        self.logger.error(f"Failed to refresh browser: {str(refresh_error)}")
+
+        return False
+
+    def _wait_until_ready(self, browser: webdriver.Chrome, readiness: PageReadiness,
+                          metric: str = 'page_ready') -> Any:
+        """Poll a readiness predicate with one WebDriver call per poll and record the time spent waiting"""
+        started = time.monotonic()
+        try:
+            return WebDriverWait(browser, readiness.timeout, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(readiness.to_script())
+            )
+        finally:
+            self.wait_metrics[metric].record(time.monotonic() - started)
+
+    def _log_wait_metrics(self) -> None:
+        for name, histogram in self.wait_metrics.items():
+            self.logger.info(f"Wait time histogram [{name}]: {histogram.summary()}")
+        if self.config.measure_page_cost:
+            self.logger.info(f"Page cost: {self.page_cost.summary()}")
+
+    def _load_known_content(self) -> None:
+        """Build the URL/md5 index of kept files so repeat posts are skipped before any network I/O"""
+        self.known_content = KnownContentIndex(
+            self.db_path, self.dirs['metadata'] / 'known_content.bloom', logger=self.logger
+        )
+        self.known_content.load()
+
+    def _is_known_content(self, url: str, md5: str = None) -> bool:
+        """Check whether a file was already kept, using the post md5 or the one in its filename"""
+        md5 = md5 or md5_from_url(url)
+        if md5 and self.known_content.contains_md5(md5):
+            return True
+        return self.known_content.contains_url(url)
+
+    def _create_nsfw_detector(self) -> Union[NSFWDetector, ProcessInferencePool]:
+        """In-process batched detector, or a worker process pool when inference_processes is set"""
+        backend_options = {}
+        if self.config.inference_backend == 'onnx':
+            intra_op_threads = self.config.onnx_intra_op_threads
+            if intra_op_threads == 0 and self.config.inference_processes > 0:
+                # Split the cores between worker processes instead of oversubscribing them
+                intra_op_threads = max(1, (os.cpu_count() or 1) // self.config.inference_processes)
+            backend_options = {
+                'onnx_path': self.config.onnx_model_path,
+                'quantized': self.config.onnx_quantized,
+                'intra_op_threads': intra_op_threads,
+                'inter_op_threads': self.config.onnx_inter_op_threads,
+            }
+
+        if self.config.inference_processes > 0:
+            if self.config.inference_backend == 'onnx':
+                # Export once here rather than racing to do it in every worker
+                backend_options['onnx_path'] = str(prepare_onnx_model(self.config.onnx_model_path,
+                                                                      self.config.onnx_quantized, logger=self.logger))
+                backend_options['quantized'] = False
+            return ProcessInferencePool(self.config.inference_processes, threshold=self.config.nsfw_threshold,
+                                        batch_size=self.config.inference_batch_size,
+                                        backend=self.config.inference_backend, backend_options=backend_options,
+                                        logger=self.logger)
+        return NSFWDetector(threshold=self.config.nsfw_threshold,
+                            batch_size=self.config.inference_batch_size,
+                            batch_wait_ms=self.config.inference_batch_wait_ms,
+                            backend=self.config.inference_backend,
+                            backend_options=backend_options)
+
+    def _start_database_writer(self) -> None:
+        if getattr(self, 'db_writer', None) is None:
+            self.db_writer = DatabaseWriter(
+                self.db_path,
+                batch_size=self.config.db_batch_size,
+                flush_interval=self.config.db_flush_interval_ms / 1000,
+                logger=self.logger
+            )
+            self.db_writer.start()
+
+    def _close_database_writer(self) -> None:
+        if getattr(self, 'db_writer', None) is not None:
+            self.db_writer.close()
+            self.db_writer = None
+
+    def _record_download(self, url: str, filename: str, status: str, file_size: int = None,
+                         md5_hash: str = None, source_page: str = None):
+        """Queue a download record for the database writer"""
+        self.db_writer.execute('''
+            INSERT OR IGNORE INTO downloads
+            (url, filename, status, file_size, md5_hash, source_page)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (url, filename, status, file_size, md5_hash, source_page))
+        self.logger.debug(f"Thread {threading.current_thread().name} queued download record: {filename}")
+
+    def _record_failure(self, url: str, error_message: str):
+        """Queue a failed download attempt, bumping the attempt count if the URL failed before"""
+        self.db_writer.execute_many([
+            ('''
+                UPDATE failed_downloads
+                SET attempts = attempts + 1,
+                    error_message = ?,
+                    timestamp = CURRENT_TIMESTAMP
+                WHERE url = ?
+            ''', (error_message, url)),
+            ('''
+                INSERT INTO failed_downloads (url, error_message)
+                SELECT ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM failed_downloads WHERE url = ?)
+            ''', (url, error_message, url))
+        ])
+
+    @property
+    def site_name(self) -> str:
+        return self.SITE_PROFILE.name if self.SITE_PROFILE else ''
+
+    def _is_incremental(self, tags: str) -> bool:
+        """High-water marks only hold for the default newest-first order"""
+        return self.config.incremental and not re.search(r'\b(?:sort|order):', tags)
+
+    def _get_high_water_mark(self, query: str) -> Optional[int]:
+        """Newest post id a previous completed crawl of this query reached, or None"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        try:
+            row = conn.execute(
+                'SELECT high_water_post_id FROM crawl_state WHERE site = ? AND query = ?',
+                (self.site_name, query)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def _set_high_water_mark(self, query: str, post_id: int) -> None:
+        """Remember a completed crawl's newest post; saved once its queued downloads have finished"""
+        with self.state.lock:
+            self.pending_high_water[query] = max(post_id, self.pending_high_water.get(query, 0))
+
+    def _flush_high_water_marks(self) -> None:
+        """Persist marks for crawls whose downloads are done; call only after the download stage drains"""
+        with self.state.lock:
+            pending, self.pending_high_water = self.pending_high_water, {}
+        for query, post_id in pending.items():
+            self._save_high_water_mark(query, post_id)
+
+    def _save_high_water_mark(self, query: str, post_id: int) -> None:
+        self.db_writer.execute('''
+            INSERT INTO crawl_state (site, query, high_water_post_id) VALUES (?, ?, ?)
+            ON CONFLICT(site, query) DO UPDATE SET
+                high_water_post_id = MAX(high_water_post_id, excluded.high_water_post_id),
+                updated_at = CURRENT_TIMESTAMP
+        ''', (self.site_name, query, post_id))
+
+    def _load_checkpoints(self) -> None:
+        """Read where each character stopped for --resume, or clear old checkpoints for a fresh run"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        try:
+            if not self.config.resume:
+                conn.execute('DELETE FROM checkpoints WHERE site = ?', (self.site_name,))
+                conn.commit()
+                self.resume_points = {}
+                return
+
+            rows = conn.execute(
+                'SELECT character, url_index, url, page_num, cursor, completed FROM checkpoints WHERE site = ?',
+                (self.site_name,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        self.resume_points = {
+            character: {
+                'url_index': url_index,
+                'url': url,
+                'page_num': page_num,
+                'cursor': json.loads(cursor) if cursor is not None else None,
+                'completed': bool(completed)
+            }
+            for character, url_index, url, page_num, cursor, completed in rows
+        }
+        self.logger.info(f"Resuming from checkpoints for {len(self.resume_points)} characters")
+
+    def _resume_point(self, character: str, urls: List[str]) -> Optional[Dict[str, Any]]:
+        """Checkpoint to continue a character from, ignoring ones whose URL list has changed"""
+        point = self.resume_points.get(character)
+        if point is None or point['completed']:
+            return point
+        if point['url_index'] >= len(urls) or urls[point['url_index']] != point['url']:
+            self.logger.warning(f"URLs for {character} changed since the checkpoint, starting over")
+            return None
+        return point
+
+    def _save_checkpoint(self, character: str, url_index: int, url: str = None, page_num: int = 0,
+                         cursor: Union[int, str] = None, completed: bool = False) -> None:
+        """Queue the page a character is on; committed with the writer's next batch"""
+        self.db_writer.execute('''
+            INSERT OR REPLACE INTO checkpoints (site, character, url_index, url, page_num, cursor, completed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (self.site_name, character, url_index, url, page_num,
+              json.dumps(cursor) if cursor is not None else None, int(completed)))
+
+    def _post_from_page(self, url: str, source_page: str = None) -> BooruPost:
+        """Best-effort post record for files found by browsing, from the post page URL and filename"""
+        match = POST_ID_PATTERN.search(source_page or '')
+        return BooruPost(
+            post_id=int(match.group(1)) if match else None,
+            md5=md5_from_url(url) or '',
+            file_url=url,
+            rating='',
+            site=self.site_name
+        )
+
+    def _record_catalog(self, job: DownloadJob, md5_hash: str, file_size: int, nsfw_score: float = None,
+                        is_animated: bool = False) -> None:
+        """Queue the post, tags, character and file rows for a kept download"""
+        post = job.post or self._post_from_page(job.url, job.source_page)
+        site = post.site or self.site_name
+        statements = []
+
+        if post.post_id is not None:
+            statements.append(('''
+                INSERT INTO posts (site, post_id, md5, rating, source_page)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(site, post_id) DO UPDATE SET
+                    md5 = COALESCE(excluded.md5, posts.md5),
+                    rating = COALESCE(excluded.rating, posts.rating)
+            ''', (site, post.post_id, post.md5 or md5_hash, post.rating or None, job.source_page)))
+            statements.extend(
+                ('INSERT OR IGNORE INTO post_tags (post_ref, tag) SELECT id, ? FROM posts WHERE site = ? AND post_id = ?',
+                 (tag, site, post.post_id))
+                for tag in post.tags
+            )
+
+        if job.character:
+            statements.append(('''
+                INSERT INTO characters (name, series) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET series = COALESCE(excluded.series, characters.series)
+            ''', (job.character, job.series)))
+
+        statements.append(('''
+            INSERT OR IGNORE INTO files
+            (url, path, md5, file_size, nsfw_score, is_animated, post_ref, character_id)
+            VALUES (?, ?, ?, ?, ?, ?,
+                    (SELECT id FROM posts WHERE site = ? AND post_id = ?),
+                    (SELECT id FROM characters WHERE name = ?))
+        ''', (job.url, str(job.final_path), md5_hash, file_size, nsfw_score, int(is_animated),
+              site, post.post_id, job.character)))
+
+        self.db_writer.execute_many(statements)
+
+    def _load_score_cache(self) -> None:
+        """Front the nsfw_scores table with an LRU; needs the database writer to be running"""
+        self.score_cache = NSFWScoreCache(
+            self.db_path, self.db_writer, self.config.nsfw_model_version, self.config.nsfw_threshold,
+            capacity=self.config.score_cache_size, logger=self.logger
+        )
+
+    def _is_known_rejection(self, url: str, md5: str = None) -> bool:
+        """Check whether this content was classified SFW before, so it needn't be downloaded again"""
+        md5 = md5 or md5_from_url(url)
+        if not md5 or not hasattr(self, 'score_cache'):
+            return False
+        # A full-image verdict outranks one made on the preview
+        verdict = self.score_cache.get(md5) or self.score_cache.get(md5, preview=True)
+        return verdict is not None and not verdict[0]
+
+    def _close_score_cache(self) -> None:
+        if hasattr(self, 'score_cache'):
+            self.logger.info(f"NSFW score cache: {self.score_cache.stats}")
+            self.score_cache.close()
+
+    def _close_known_content(self) -> None:
+        if hasattr(self, 'known_content'):
+            self.logger.info(f"Content filter lookups: {self.known_content.stats}")
+            self.known_content.save()
+            self.known_content.close()
+
+    def _submit_download(self, url: str, source_page: str = None, post: BooruPost = None,
+                         character: str = None) -> bool:
+        """
+        Hand a file to the async download stage, or download it inline when that is disabled.
+
+        Returns:
+            bool: True if the file was queued, already present, downloaded and kept, or
+                deliberately skipped; False only when handing it off failed
+        """
+        if self._is_known_content(url, post.md5 if post else None):
+            self.logger.debug(f"Skipping already downloaded file {url}")
+            return True
+        if self._is_known_rejection(url, post.md5 if post else None):
+            self.logger.debug(f"Skipping file already classified SFW {url}")
+            return True
+        if post is not None and self.rating_policy.decide(post.rating) is False:
+            self.logger.debug(f"Skipping {post.rating} post {post.post_id} without downloading")
+            return True
+
+        if self.download_engine is None:
+            return self._download_image(url, source_page, post=post, character=character)
+
+        job = self._prepare_download(url, source_page, post=post, character=character)
+        if job is None:
+            return False
+        if job.final_path.exists():
+            self.logger.info(f"File already exists at {job.final_path}")
+            return True
+
+        self.download_engine.submit(job)
+        return True
+
+    def _download_referer(self, url: str, source_page: str = None) -> str:
+        return source_page if source_page else url
+
+    def _preview_url(self, post: Optional[BooruPost], url: str) -> Optional[str]:
+        """Smaller rendition of a post to classify first, or None when the original must be classified"""
+        if not self.config.preview_classification or post is None:
+            return None
+        # Already settled by its rating, or animated where a still rendition would miss later frames
+        if self.rating_policy.decide(post.rating) is not None or post.extension == '.gif':
+            return None
+        renditions = [post.preview_url, post.sample_url]
+        if self.config.preview_source == 'sample':
+            renditions.reverse()
+        for rendition in renditions:
+            if rendition and rendition != url:
+                return rendition
+        return None
+
+    def _screen_preview(self, job: DownloadJob) -> bool:
+        """
+        Classify a job's downloaded preview, returning whether its original is worth fetching.
+
+        A passing verdict is carried on the job so the original isn't classified again. An
+        unreadable preview passes without a verdict, leaving the original to the detector.
+        """
         try:
-            with self.lock:
-                if character not in self.active_characters and character not in self.completed_characters:
-                    self.active_characters.add(character)
-                    self.logger.debug(f"Successfully started {character}")
-                    return True
-                self.logger.debug(f"Could not start {character} - already active or completed")
-                return False
+            with Image.open(job.preview_path) as img:
+                img.verify()
+            is_nsfw, confidence = self.nsfw_detector.check_content(job.preview_path)
+            if confidence is None:
+                raise ValueError("detector could not score the preview")
         except Exception as e:
-            self.logger.error(f"Error starting {character}: {str(e)}")
+            self.logger.debug(f"Could not screen preview {job.preview_url}: {str(e)}")
+            return True
+        finally:
+            if job.preview_path.exists():
+                job.preview_path.unlink()
+
+        # Remembered under the original's md5 so later runs skip the post before fetching the preview
+        if job.post is not None and job.post.md5:
+            self.score_cache.put(job.post.md5, is_nsfw, confidence, preview=True)
+
+        if not is_nsfw:
+            self.logger.warning(f"Skipping SFW post from {job.url} on its preview (confidence: {confidence:.2f})")
             return False
+        job.nsfw_verdict = (is_nsfw, confidence)
+        return True
 
-    def complete_character(self, character: str) -> None:
-        """Mark character as completed"""
-        self.logger.debug(f"Attempting to complete {character}")
+    def _fetch_preview(self, job: DownloadJob) -> bool:
+        """Download a job's preview inline, returns False if it couldn't be fetched"""
         try:
-            with self.lock:
-                if character in self.active_characters:
-                    self.active_characters.remove(character)
-                    self.completed_characters.add(character)
-                    self.logger.debug(f"Successfully completed {character}")
+            with self.http.get(job.preview_url, rate=self.config.download_rate, headers=job.headers,
+                               timeout=self.config.request_timeout) as response:
+                response.raise_for_status()
+                job.preview_path.write_bytes(response.content)
+            return True
         except Exception as e:
-            self.logger.error(f"Error completing {character}: {str(e)}")
-
-class HentaiScraper(ABC):
-    """Enhanced abstract base class for scrapers with threading support"""
+            self.logger.debug(f"Could not fetch preview {job.preview_url}: {str(e)}")
+            return False
 
-    def __init__(self, config: ScraperConfig):
-        """Initialize the scraper with configuration"""
-        self.config = config
-        self.state = ScraperState()
-        self.thread_local = threading.local()
-        self._setup_logging()
+    def _prepare_download(self, url: str, source_page: str = None, post: BooruPost = None,
+                          character: str = None) -> Optional[DownloadJob]:
+        """Work out paths and request headers for a download, returns None for an invalid URL"""
+        # Clean and validate URL
+        if not url:
+            self.logger.error("Invalid URL provided")
+            return None
 
-    def _setup_logging(self):
-        """Configure logging with thread information"""
-        log_format = '%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s'
-        log_level = logging.DEBUG if self.config.verbose_logging else logging.INFO
+        # Get character-specific path
+        char_path = self._get_character_path(url, source_page)
 
-        # Create a unique log file for each scraper class
-        log_file = Path(f'{self.__class__.__name__.lower()}.log')
+        # Generate filename and paths
+        filename = self._generate_filename(url)
+        temp_path = self.dirs['temp'] / f"temp_{filename}"
+        final_path = self.config.base_save_path / char_path / filename
 
-        # Configure root logger
-        logging.basicConfig(
-            level=log_level,
-            format=log_format,
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
+        self.logger.debug(f"Temp path: {temp_path}")
+        self.logger.debug(f"Final path: {final_path}")
 
-        # Create logger specific to this instance
-        self.logger = logging.getLogger(self.__class__.__name__)
+        # Create directories if they don't exist
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
 
-    @abstractmethod
-    def setup(self) -> bool:
+        headers = {
+            'User-Agent': self.config.user_agent,
+            'Accept': 'image/webp,image/apng,image/gif,image/*,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Referer': self._download_referer(url, source_page)
+        }
+        # Character paths end in <series>/<character>, or raw when the classifier found no match
+        series = char_path.parts[-2] if len(char_path.parts) >= 2 and char_path.name != 'raw' else None
+        preview_url = self._preview_url(post, url)
+        return DownloadJob(url=url, source_page=source_page, filename=filename,
+                           temp_path=temp_path, final_path=final_path, headers=headers,
+                           post=post, character=character, series=series, preview_url=preview_url,
+                           preview_path=self.dirs['temp'] / f"preview_{filename}" if preview_url else None)
+
+    def _download_image(self, url: str, source_page: str = None, post: BooruPost = None,
+                        character: str = None) -> bool:
         """
-        Setup scraper-specific requirements
+        Download and save an image or GIF from the given URL.
+
+        Args:
+            url (str): URL of the image to download
+            source_page (str, optional): URL of the page containing the image
 
         Returns:
-            bool: True if setup was successful, False otherwise
+            bool: True if the file was kept, already present or deliberately skipped, False if it failed
         """
-        pass
+        job = None
+        try:
+            job = self._prepare_download(url, source_page, post=post, character=character)
+            if job is None:
+                return False
 
-    @abstractmethod
-    def process_character(self, character: str, urls: List[str], max_pages: int) -> None:
-        """
-        Process a single character's URLs
+            # Check if file already exists
+            if job.final_path.exists():
+                self.logger.info(f"File already exists at {job.final_path}")
+                return True
 
-        Args:
-            character (str): Character name being processed
-            urls (List[str]): List of URLs to process for this character
-            max_pages (int): Maximum number of pages to process per URL
+            # Screen on the small rendition before pulling the original
+            if job.preview_url is not None and self._fetch_preview(job) and not self._screen_preview(job):
+                return True
+
+            # Closing the response returns the connection to the shared pool
+            with self.http.get(url, rate=self.config.download_rate, stream=True, headers=job.headers,
+                               timeout=self.config.request_timeout) as response:
+                response.raise_for_status()
+
+                # Save to temporary file
+                self.logger.debug(f"Downloading to temporary file: {job.temp_path}")
+                with open(job.temp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.config.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+
+            # An SFW rejection is a deliberate skip, only None means the file couldn't be processed
+            return self._finalize_download(job) is not None
+
+        except Exception as e:
+            self.logger.error(f"Error downloading {url}: {str(e)}")
+            self._record_failure(url, str(e))
+            if job is not None and job.temp_path.exists():
+                try:
+                    job.temp_path.unlink()
+                except Exception as cleanup_error:
+                    self.logger.error(f"Error cleaning up temporary file: {cleanup_error}")
+            return False
+
+    def _finalize_download(self, job: DownloadJob) -> Optional[bool]:
         """
-        pass
+        Verify and classify a downloaded temp file, keeping it only if it is NSFW.
 
-    def process_urls(self, urls: Dict[str, str], max_pages: int = 380):
-        """Process multiple URLs using thread pool with rolling queue of 4 concurrent scrapers"""
+        Returns:
+            Optional[bool]: True if the file was kept, False if it was rejected as SFW,
+            None if it could not be verified or processed
+        """
+        temp_path, final_path = job.temp_path, job.final_path
         try:
-            self.logger.info(f"Starting scraping with 4 concurrent scrapers")
-            self.logger.info(f"Total characters to process: {len(urls)}")
-
-            # Create processed URLs dictionary with correct keys
-            processed_urls = {}
-            for char_key, url in urls.items():
-                # Get the correct prefixed key for each character
-                prefixed_key = self.character_classifier.get_url_key(char_key)
-                if prefixed_key != char_key:
-                    self.logger.info(f"Remapping character key from {char_key} to {prefixed_key}")
-                processed_urls[prefixed_key] = url
-
-            # System diagnostics
-            process = psutil.Process()
-            self.logger.info(f"Current memory usage: {process.memory_info().rss / 1024 / 1024:.2f} MB")
-            self.logger.info(f"Current thread count: {threading.active_count()}")
-            self.logger.info("Current threads: " + ", ".join([t.name for t in threading.enumerate()]))
-
-            # Create thread pool with exactly 4 workers
-            self.logger.info("Creating thread pool executor...")
-            executor = concurrent.futures.ThreadPoolExecutor(
-                max_workers=4,
-                thread_name_prefix="scraper"
-            )
-            self.logger.info("Thread pool executor created")
-
-            try:
-                # Convert all items to list for easier queueing
-                remaining_chars = list(processed_urls.items())
-                active_futures = {}  # Track active futures
-                completed_count = 0
+            # Verify the file exists and is not empty
+            if not temp_path.exists() or temp_path.stat().st_size == 0:
+                raise ValueError("Downloaded file is empty or missing")
 
-                # Initial launch of first 4 characters
-                initial_chars = remaining_chars[:4]
-                remaining_chars = remaining_chars[4:]
+            # A clear-cut rating or a passed preview settles it; otherwise content seen before keeps its verdict
+            file_hash = self._get_file_hash(temp_path)
+            rating_verdict = self.rating_policy.decide(job.post.rating) if job.post else None
+            settled = rating_verdict is not None or job.nsfw_verdict is not None
+            cached = self.score_cache.get(file_hash) if not settled else None
+            if cached is not None:
+                is_nsfw, confidence, is_gif = cached
+            else:
+                # Verify it's a valid image/GIF file
+                try:
+                    with Image.open(temp_path) as img:
+                        img.verify()
+                        is_gif = getattr(img, "is_animated", False)
+                except Exception as e:
+                    self.logger.error(f"Invalid image file: {str(e)}")
+                    temp_path.unlink()
+                    return None
 
-                self.logger.info(f"Starting initial 4 characters: {[char for char, _ in initial_chars]}")
+                if rating_verdict is not None:
+                    is_nsfw, confidence = rating_verdict, None
+                elif job.nsfw_verdict is not None:
+                    # The preview already passed the detector
+                    is_nsfw, confidence = job.nsfw_verdict
+                else:
+                    # Check if content is NSFW
+                    is_nsfw, confidence = self.nsfw_detector.check_content(temp_path)
+                    # A detector failure is kept to be safe, but isn't a verdict worth remembering
+                    if confidence is not None:
+                        self.score_cache.put(file_hash, is_nsfw, confidence, is_animated=is_gif)
 
-                # Submit initial tasks
-                for character, url_list in initial_chars:
-                    self.logger.info(f"Processing {character}")
-                    url_list = [url_list] if isinstance(url_list, str) else url_list
+            if is_nsfw:  # Keep NSFW content
+                self.known_content.add(url=job.url, md5=file_hash)
 
-                    if self.state.start_character(character):
-                        self.logger.info(f"Lock acquired for {character}")
-                        future = executor.submit(self._process_character_wrapper, character, url_list, max_pages)
-                        active_futures[future] = character
-                        self.logger.info(f"Task submitted for {character}")
-                    else:
-                        self.logger.warning(f"Could not acquire lock for {character}")
+                # Move file to final location
+                temp_path.rename(final_path)
 
-                # Rest of the existing process_urls code...
+                # Record successful download
+                self._record_download(
+                    url=job.url,
+                    filename=job.filename,
+                    status='success',
+                    file_size=final_path.stat().st_size,
+                    md5_hash=file_hash,
+                    source_page=job.source_page
+                )
+                self._record_catalog(job, file_hash, final_path.stat().st_size, nsfw_score=confidence,
+                                     is_animated=is_gif)
 
-            finally:
-                self.logger.info("Shutting down executor")
-                executor.shutdown(wait=True)
-                self.logger.info("Executor shutdown complete")
+                self.logger.info(
+                    f"Successfully downloaded NSFW {'GIF' if is_gif else 'image'}: "
+                    f"{job.filename} to {final_path}"
+                )
+                return True
+            else:
+                self.logger.warning(
+                    f"Skipping SFW {'GIF' if is_gif else 'image'} from {job.url} "
+                    + (f"(confidence: {confidence:.2f})" if confidence is not None else f"(rated {job.post.rating})")
+                )
+                temp_path.unlink()
+                return False
 
         except Exception as e:
-            self.logger.error(f"Error in process_urls: {str(e)}")
-            self.logger.exception("Error traceback:")
-            raise
+            self.logger.error(f"Error processing download {job.url}: {str(e)}")
+            self._record_failure(job.url, str(e))
+            if temp_path.exists():
+                try:
+                    temp_path.unlink()
+                except Exception as cleanup_error:
+                    self.logger.error(f"Error cleaning up temporary file: {cleanup_error}")
+            return None
+
     @abstractmethod
     def cleanup(self) -> None:
         """
@@ -1626,6 +5092,17 @@ class URLManager:
 
 
 class ThreadedGelbooruScraper(HentaiScraper):
+    SITE_PROFILE = SiteProfile(
+        name='gelbooru',
+        # List pages are server rendered, so the thumbnails exist once the DOM is parsed
+        list_ready=PageReadiness(script="return document.readyState !== 'loading';"),
+        post_ready=PageReadiness(selector="img#image")
+    )
+    EXPANDED_IMAGE_READY = PageReadiness(
+        script="var img = document.querySelector('img#image'); "
+               "return img && img.src.indexOf('/images/') !== -1 ? img.src : null;"
+    )
+
     def __init__(self, config: ScraperConfig):
         # Initialize logger first, before anything else
         logging.basicConfig(
@@ -1645,9 +5122,32 @@ class ThreadedGelbooruScraper(HentaiScraper):
         # Initialize important attributes
         self.thread_local = threading.local()
         self.state = ScraperState()
-        self.db_lock = threading.Lock()
+        self.pending_high_water: Dict[str, int] = {}
+        self.stop_requested = threading.Event()
         self.character_classifier = CharacterClassifier()
-        self.nsfw_detector = NSFWDetector(threshold=config.nsfw_threshold)
+        self.nsfw_detector = self._create_nsfw_detector()
+        self.rating_policy = RatingPolicy.from_config(config)
+        self.http = HTTPSessionPool(config, logger=self.logger)
+        self.api_client = GelbooruAPIClient(config, http=self.http, logger=self.logger)
+        self.download_engine = (AsyncDownloadEngine(config, self.http, self._finalize_download,
+                                                    on_failure=self._record_failure, screen=self._screen_preview,
+                                                    logger=self.logger)
+                                if config.async_downloads else None)
+        self.url_resolver = GelbooruURLResolver(config, http=self.http, logger=self.logger)
+        self.browser_pool = BrowserPool(
+            self._create_browser,
+            max_size=config.browser_pool_size,
+            max_navigations=config.browser_max_navigations,
+            max_rss_mb=config.browser_max_rss_mb,
+            logger=self.logger
+        )
+        self.wait_metrics = {
+            'navigate': LatencyHistogram('navigate'),
+            'page_ready': LatencyHistogram('page_ready'),
+            'image_expand': LatencyHistogram('image_expand'),
+            'dom_content_loaded': LatencyHistogram('dom_content_loaded')
+        }
+        self.page_cost = PageCostStats('dom_only' if self.dom_only else 'full')
 
         # Create base directories
         self.dirs = {
@@ -1723,34 +5223,13 @@ class ThreadedGelbooruScraper(HentaiScraper):
             # Initialize database
             self.db_path = self.dirs['metadata'] / 'downloads.db'
             conn = sqlite3.connect(str(self.db_path))
-            c = conn.cursor()
-
-            # Create tables
-            c.execute('''
-                   CREATE TABLE IF NOT EXISTS downloads (
-                       id INTEGER PRIMARY KEY AUTOINCREMENT,
-                       url TEXT NOT NULL UNIQUE,
-                       filename TEXT NOT NULL,
-                       timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                       status TEXT,
-                       file_size INTEGER,
-                       md5_hash TEXT,
-                       source_page TEXT
-                   )
-               ''')
-
-            c.execute('''
-                   CREATE TABLE IF NOT EXISTS failed_downloads (
-                       id INTEGER PRIMARY KEY AUTOINCREMENT,
-                       url TEXT NOT NULL,
-                       timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                       error_message TEXT,
-                       attempts INTEGER DEFAULT 1
-                   )
-               ''')
-
+            migrate_database(conn, self.logger)
             conn.commit()
             conn.close()
+            self._load_known_content()
+            self._load_checkpoints()
+            self._start_database_writer()
+            self._load_score_cache()
 
             self.logger.info("Setup completed successfully")
             return True
@@ -1759,113 +5238,37 @@ class ThreadedGelbooruScraper(HentaiScraper):
             self.logger.error(f"Setup failed: {str(e)}")
             raise
 
-    def _init_database_connection(self):
-        """Initialize thread-local database connection and return connection object"""
-        if not hasattr(self.thread_local, 'db_connection'):
-            try:
-                # Create a new connection for this thread
-                self.thread_local.db_connection = sqlite3.connect(
-                    str(self.db_path),
-                    timeout=30.0  # Add timeout for busy database
-                )
-                # Enable WAL mode for better concurrent access
-                with self.db_lock:
-                    self.thread_local.db_connection.execute('PRAGMA journal_mode=WAL')
-                    # Set busy timeout
-                    self.thread_local.db_connection.execute('PRAGMA busy_timeout=30000')
-                self.logger.debug(f"Created new database connection for thread {threading.current_thread().name}")
-            except Exception as e:
-                self.logger.error(f"Failed to connect to database: {str(e)}")
-                raise
-
-        return self.thread_local.db_connection
-
-    def _record_download(self, url: str, filename: str, status: str, file_size: int = None,
-                         md5_hash: str = None, source_page: str = None):
-        """Record download attempt in database with thread safety"""
-        try:
-            conn = self._init_database_connection()
-
-            with self.db_lock:  # Use lock for write operations
-                c = conn.cursor()
-                try:
-                    c.execute('''
-                        INSERT INTO downloads 
-                        (url, filename, status, file_size, md5_hash, source_page)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (url, filename, status, file_size, md5_hash, source_page))
-
-                    conn.commit()
-                    self.logger.debug(f"Thread {threading.current_thread().name} recorded download: {filename}")
-                except sqlite3.IntegrityError as e:
-                    # Handle duplicate entries
-                    self.logger.warning(f"Duplicate download record for URL: {url}")
-                    conn.rollback()
-                except Exception as e:
-                    self.logger.error(f"Database error in record_download: {str(e)}")
-                    conn.rollback()
-                    raise
-                finally:
-                    c.close()
-
-        except Exception as e:
-            self.logger.error(f"Failed to record download: {str(e)}")
-
-    def _record_failure(self, url: str, error_message: str):
-        """Record failed download attempt with thread safety"""
-        try:
-            conn = self._init_database_connection()
-
-            with self.db_lock:  # Use lock for write operations
-                c = conn.cursor()
-                try:
-                    # Check if URL already exists in failed_downloads
-                    c.execute('SELECT attempts FROM failed_downloads WHERE url = ?', (url,))
-                    result = c.fetchone()
-
-                    if result:
-                        # Update existing record
-                        c.execute('''
-                            UPDATE failed_downloads 
-                            SET attempts = attempts + 1,
-                                error_message = ?,
-                                timestamp = CURRENT_TIMESTAMP
-                            WHERE url = ?
-                        ''', (error_message, url))
-                    else:
-                        # Create new record
-                        c.execute('''
-                            INSERT INTO failed_downloads (url, error_message)
-                            VALUES (?, ?)
-                        ''', (url, error_message))
-
-                    conn.commit()
-                    self.logger.debug(f"Thread {threading.current_thread().name} recorded failure for URL: {url}")
-
-                except Exception as e:
-                    self.logger.error(f"Database error in record_failure: {str(e)}")
-                    conn.rollback()
-                    raise
-                finally:
-                    c.close()
-
-        except Exception as e:
-            self.logger.error(f"Failed to record failure: {str(e)}")
-
     def cleanup(self) -> None:
         """Implementation of abstract cleanup method"""
         self.logger.info("Starting cleanup...")
         try:
-            # Close all thread-local browsers
-            if hasattr(self, 'thread_local'):
-                for thread_id, thread in threading._active.items():
-                    try:
-                        if hasattr(thread, '_thread_local'):
-                            browser = getattr(thread._thread_local, 'browser', None)
-                            if browser:
-                                browser.quit()
-                    except Exception as e:
-                        self.logger.error(f"Error cleaning up browser for thread {thread_id}: {str(e)}")
+            # Finish queued downloads before tearing anything else down
+            if getattr(self, 'download_engine', None) is not None:
+                self.download_engine.stop()
+            if getattr(self, 'db_writer', None) is not None:
+                self._flush_high_water_marks()
+            self._close_database_writer()
+            if hasattr(self, 'nsfw_detector'):
+                self.nsfw_detector.close()
+
+            if hasattr(self, 'wait_metrics'):
+                self._log_wait_metrics()
+
+            if hasattr(self, 'http'):
+                self.logger.info(f"HTTP connection reuse: {self.http.stats()}")
+                self.logger.info(f"Host rate limits: {self.http.rate_limiter.stats()}")
+                self.http.close()
+
+            self._close_known_content()
+            self._close_score_cache()
+
+            # Close pooled browsers
+            if hasattr(self, 'browser_pool'):
+                try:
+                    self.logger.info(f"Browser pool stats: {self.browser_pool.stats()}")
+                    self.browser_pool.close()
+                except Exception as e:
+                    self.logger.error(f"Error closing browser pool: {str(e)}")
 
             # Clean up temporary files
             if hasattr(self, 'dirs') and 'temp' in self.dirs:
@@ -1894,15 +5297,6 @@ class ThreadedGelbooruScraper(HentaiScraper):
 
             self.logger.info("Cleanup completed successfully")
 
-            # Close thread-local database connections
-            if hasattr(self.thread_local, 'db_connection'):
-                try:
-                    self.thread_local.db_connection.close()
-                    delattr(self.thread_local, 'db_connection')
-                    self.logger.debug(f"Closed database connection for thread {threading.current_thread().name}")
-                except Exception as e:
-                    self.logger.error(f"Error closing database connection: {str(e)}")
-
             # Call parent cleanup
             super().cleanup()
 
@@ -1911,247 +5305,95 @@ class ThreadedGelbooruScraper(HentaiScraper):
             self.logger.error(f"Cleanup failed: {str(e)}")
             raise
 
-    def _get_thread_browser(self):
-        """Get or create a browser instance for the current thread with enhanced error handling"""
-        browser_id = id(threading.current_thread())
-        self.logger.debug(f"Getting browser for thread {threading.current_thread().name} (ID: {browser_id})")
-
-        if not hasattr(self.thread_local, 'browser'):
-            try:
-                with self.state.browser_lock:
-                    self.logger.info(f"Creating new browser for thread {threading.current_thread().name}")
-
-                    options = webdriver.ChromeOptions()
-                    if self.config.headless:
-                        options.add_argument('--headless=new')
-
-                    options.add_argument('--no-sandbox')
-                    options.add_argument('--disable-dev-shm-usage')
-                    options.add_argument('--disable-gpu')
-                    options.add_argument('--disable-software-rasterizer')
-                    options.add_argument('--disable-extensions')
-                    options.add_argument('--start-maximized')
-                    options.add_argument(f'user-agent={self.config.user_agent}')
-
-                    # Add more stability options
-                    options.add_argument('--disable-features=NetworkService')
-                    options.add_argument('--disable-features=VizDisplayCompositor')
-                    options.add_argument('--disable-dev-shm-usage')
-                    options.add_argument('--no-first-run')
-                    options.add_argument('--no-default-browser-check')
-                    options.add_argument('--disable-background-networking')
-                    options.add_argument('--disable-sync')
-                    options.add_argument('--disable-translate')
-                    options.add_argument('--hide-scrollbars')
-                    options.add_argument('--metrics-recording-only')
-                    options.add_argument('--mute-audio')
-                    options.add_argument('--no-first-run')
-                    options.add_argument('--safebrowsing-disable-auto-update')
-                    options.add_argument('--password-store=basic')
-
-                    service = webdriver.ChromeService()
-                    browser = webdriver.Chrome(service=service, options=options)
-
-                    # Set timeouts
-                    browser.set_page_load_timeout(30)
-                    browser.set_script_timeout(30)
-                    browser.implicitly_wait(10)
-
-                    self.thread_local.browser = browser
-                    self.logger.info(f"Successfully created browser for thread {threading.current_thread().name}")
-
-            except Exception as e:
-                self.logger.error(f"Failed to create browser for thread {threading.current_thread().name}: {str(e)}")
-                self.logger.exception("Full traceback:")
-                raise
-
-        return self.thread_local.browser
-
-    def _safe_navigate(self, url: str, max_retries=3) -> bool:
-        """Safely navigate to a URL with retries"""
-        browser = self._get_thread_browser()
-        self.logger.debug(f"Navigating to {url}")
-
-        for attempt in range(max_retries):
-            try:
-                browser.get(url)
-                WebDriverWait(browser, self.config.request_timeout).until(
-                    lambda driver: driver.execute_script("return document.readyState") == "complete"
-                )
-                time.sleep(2)
-                return True
-
-            except Exception as e:
-                self.logger.warning(f"Navigation attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    self.logger.error(f"Failed to navigate to {url} after {max_retries} attempts")
-                    return False
-                time.sleep(2 * (attempt + 1))
-
-                if attempt == max_retries - 2:
-                    try:
-                        browser.quit()
-                        delattr(self.thread_local, 'browser')
-                        browser = self._get_thread_browser()
-                    except Exception as e:
-                        self.logger.error(f"Failed to refresh browser: {str(e)}")
-
-        return False
-
-    def _expand_image(self, page_url: str) -> Optional[str]:
-        """Navigate to page and expand the image to get the full resolution URL"""
-        browser = self._get_thread_browser()
-        self.logger.debug(f"Expanding image from {page_url}")
-
-        if not self._safe_navigate(page_url):
-            return None
+    def _create_browser(self) -> webdriver.Chrome:
+        """Launch a configured Chrome session for the browser pool"""
+        self.logger.info(f"Creating new browser from thread {threading.current_thread().name}")
 
         try:
-            # Wait for the original image
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "img#image"))
-            )
-
-            # Execute resize transition
-            browser.execute_script("resizeTransition();")
-            time.sleep(2)
-
-            try:
-                # Wait for the expanded image
-                WebDriverWait(browser, 10).until(
-                    lambda driver: driver.find_element(By.CSS_SELECTOR, "img#image").get_attribute("src")
-                                   and "/images/" in driver.find_element(By.CSS_SELECTOR, "img#image").get_attribute(
-                        "src")
-                )
-
-                image = browser.find_element(By.CSS_SELECTOR, "img#image")
-                src = image.get_attribute('src')
-
-                if not src or not '/images/' in src:
-                    self.logger.warning(f"Invalid image source: {src}")
-                    return None
-
-                self.logger.debug(f"Successfully expanded image: {src}")
-                return src
-
-            except Exception as wait_error:
-                self.logger.error(f"Error waiting for expanded image: {str(wait_error)}")
-                return None
+            options = webdriver.ChromeOptions()
+            options.page_load_strategy = self.config.page_load_strategy
+            self._apply_dom_only_options(options)
+            if self.config.headless:
+                options.add_argument('--headless=new')
+
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--disable-gpu')
+            options.add_argument('--disable-software-rasterizer')
+            options.add_argument('--disable-extensions')
+            options.add_argument('--start-maximized')
+            options.add_argument(f'user-agent={self.config.user_agent}')
+
+            # Add more stability options
+            options.add_argument('--disable-features=NetworkService')
+            options.add_argument('--disable-features=VizDisplayCompositor')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--no-first-run')
+            options.add_argument('--no-default-browser-check')
+            options.add_argument('--disable-background-networking')
+            options.add_argument('--disable-sync')
+            options.add_argument('--disable-translate')
+            options.add_argument('--hide-scrollbars')
+            options.add_argument('--metrics-recording-only')
+            options.add_argument('--mute-audio')
+            options.add_argument('--no-first-run')
+            options.add_argument('--safebrowsing-disable-auto-update')
+            options.add_argument('--password-store=basic')
+
+            service = webdriver.ChromeService()
+            browser = webdriver.Chrome(service=service, options=options)
+            self._apply_dom_only_blocking(browser)
+
+            # Set timeouts
+            browser.set_page_load_timeout(30)
+            browser.set_script_timeout(30)
+            browser.implicitly_wait(10)
+
+            self.logger.info(f"Successfully created browser from thread {threading.current_thread().name}")
+            return browser
 
         except Exception as e:
-            self.logger.error(f"Error expanding image on {page_url}: {str(e)}")
-            return None
-
-    def _download_image(self, url: str, source_page: str = None) -> bool:
-        """
-        Download and save an image or GIF from the given URL.
-
-        Args:
-            url (str): URL of the image to download
-            source_page (str, optional): URL of the page containing the image
-
-        Returns:
-            bool: True if download was successful, False otherwise
-        """
-        try:
-            # Clean and validate URL
-            if not url:
-                self.logger.error("Invalid URL provided")
-                return False
-
-            # Get character-specific path
-            char_path = self._get_character_path(url, source_page)
-
-            # Generate filename and paths
-            filename = self._generate_filename(url)
-            temp_path = self.dirs['temp'] / f"temp_{filename}"
-            final_path = self.config.base_save_path / char_path / filename
-
-            self.logger.debug(f"Temp path: {temp_path}")
-            self.logger.debug(f"Final path: {final_path}")
-
-            # Create directories if they don't exist
-            temp_path.parent.mkdir(parents=True, exist_ok=True)
-            final_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Check if file already exists
-            if final_path.exists():
-                self.logger.info(f"File already exists at {final_path}")
-                return True
-
-            # Download file with proper headers
-            headers = {
-                'User-Agent': self.config.user_agent,
-                'Accept': 'image/webp,image/apng,image/gif,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Referer': source_page if source_page else url
-            }
-
-            response = requests.get(url, stream=True, headers=headers, timeout=self.config.request_timeout)
-            response.raise_for_status()
+            self.logger.error(f"Failed to create browser from thread {threading.current_thread().name}: {str(e)}")
+            self.logger.exception("Full traceback:")
+            raise
 
-            # Save to temporary file
-            self.logger.debug(f"Downloading to temporary file: {temp_path}")
-            with open(temp_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=self.config.chunk_size):
-                    if chunk:
-                        f.write(chunk)
+    def _expand_image(self, page_url: str) -> Optional[str]:
+        """Navigate to page and expand the image to get the full resolution URL"""
+        browser = self._get_thread_browser()
+        self.logger.debug(f"Expanding image from {page_url}")
 
-            # Verify the file exists and is not empty
-            if not temp_path.exists() or temp_path.stat().st_size == 0:
-                raise ValueError("Downloaded file is empty or missing")
+        if not self._safe_navigate(page_url, self.SITE_PROFILE.post_ready):
+            return None
 
-            # Verify it's a valid image/GIF file
-            try:
-                with Image.open(temp_path) as img:
-                    img.verify()
-                    is_gif = getattr(img, "is_animated", False)
-            except Exception as e:
-                self.logger.error(f"Invalid image file: {str(e)}")
-                temp_path.unlink()
-                return False
+        try:
+            # Execute resize transition
+            browser.execute_script("resizeTransition();")
 
-            # Check if content is NSFW
-            is_nsfw, confidence = self.nsfw_detector.check_content(temp_path)
+            if self.config.capture_network_urls:
+                src = self._wait_for_network_image(browser, self.EXPANDED_IMAGE_READY.timeout)
+                if src:
+                    self.logger.debug(f"Captured image URL from network events: {src}")
+                    return src
+                self.logger.debug("No image request captured, falling back to DOM polling")
 
-            if is_nsfw:  # Keep NSFW content
-                # Calculate file hash
-                file_hash = self._get_file_hash(temp_path)
+            try:
+                # Wait for the expanded image, reading src in the same call that checks it
+                src = self._wait_until_ready(browser, self.EXPANDED_IMAGE_READY, metric='image_expand')
 
-                # Move file to final location
-                temp_path.rename(final_path)
+                if not src or not '/images/' in src:
+                    self.logger.warning(f"Invalid image source: {src}")
+                    return None
 
-                # Record successful download
-                self._record_download(
-                    url=url,
-                    filename=filename,
-                    status='success',
-                    file_size=final_path.stat().st_size,
-                    md5_hash=file_hash,
-                    source_page=source_page
-                )
+                self.logger.debug(f"Successfully expanded image: {src}")
+                return src
 
-                self.logger.info(
-                    f"Successfully downloaded NSFW {'GIF' if is_gif else 'image'}: "
-                    f"{filename} to {final_path}"
-                )
-                return True
-            else:
-                self.logger.warning(
-                    f"Skipping SFW {'GIF' if is_gif else 'image'} from {url} "
-                    f"(confidence: {confidence:.2f})"
-                )
-                temp_path.unlink()
-                return False
+            except Exception as wait_error:
+                self.logger.error(f"Error waiting for expanded image: {str(wait_error)}")
+                return None
 
         except Exception as e:
-            self.logger.error(f"Error downloading {url}: {str(e)}")
-            if 'temp_path' in locals() and temp_path.exists():
-                try:
-                    temp_path.unlink()
-                except Exception as cleanup_error:
-                    self.logger.error(f"Error cleaning up temporary file: {cleanup_error}")
-            return False
+            self.logger.error(f"Error expanding image on {page_url}: {str(e)}")
+            return None
 
     def _get_file_hash(self, file_path: Path) -> str:
         """Calculate MD5 hash of file"""
@@ -2201,231 +5443,81 @@ class ThreadedGelbooruScraper(HentaiScraper):
             self.logger.error(f"Error parsing character path: {str(e)}")
             return Path('raw')
 
-    def process_urls(self, urls: Dict[str, str], max_pages: int = 380):
-        """Process multiple URLs using thread pool with rolling queue of 4 concurrent scrapers"""
-        try:
-            self.logger.info(f"Starting scraping with 4 concurrent scrapers")
-            self.logger.info(f"Total characters to process: {len(urls)}")
-
-            # System diagnostics
-            process = psutil.Process()
-            self.logger.info(f"Current memory usage: {process.memory_info().rss / 1024 / 1024:.2f} MB")
-            self.logger.info(f"Current thread count: {threading.active_count()}")
-            self.logger.info("Current threads: " + ", ".join([t.name for t in threading.enumerate()]))
-
-            # Create thread pool with exactly 4 workers
-            self.logger.info("Creating thread pool executor...")
-            executor = concurrent.futures.ThreadPoolExecutor(
-                max_workers=4,
-                thread_name_prefix="scraper"
-            )
-            self.logger.info("Thread pool executor created")
-
-            try:
-                # Convert all items to list for easier queueing
-                remaining_chars = list(urls.items())
-                active_futures = {}  # Track active futures
-                completed_count = 0
-
-                # Initial launch of first 4 characters
-                initial_chars = remaining_chars[:4]
-                remaining_chars = remaining_chars[4:]
-
-                self.logger.info(f"Starting initial 4 characters: {[char for char, _ in initial_chars]}")
-
-                # Submit initial tasks
-                for character, url_list in initial_chars:
-                    self.logger.info(f"Processing {character}")
-                    url_list = [url_list] if isinstance(url_list, str) else url_list
-
-                    if self.state.start_character(character):
-                        self.logger.info(f"Lock acquired for {character}")
-                        future = executor.submit(self._process_character_wrapper, character, url_list, max_pages)
-                        active_futures[future] = character
-                        self.logger.info(f"Task submitted for {character}")
-                    else:
-                        self.logger.warning(f"Could not acquire lock for {character}")
-
-                # Process results and add new tasks as others complete
-                while active_futures or remaining_chars:
-                    # Wait for any future to complete
-                    done, _ = concurrent.futures.wait(
-                        active_futures.keys(),
-                        timeout=None,
-                        return_when=concurrent.futures.FIRST_COMPLETED
-                    )
-
-                    # Process completed futures
-                    for future in done:
-                        character = active_futures[future]
-                        try:
-                            future.result(timeout=30)
-                            completed_count += 1
-                            self.logger.info(f"Completed processing {character} ({completed_count}/{len(urls)})")
-                        except Exception as e:
-                            self.logger.error(f"Error processing {character}: {str(e)}")
-                            self.logger.exception("Processing error traceback:")
-                        finally:
-                            self.state.complete_character(character)
-                            del active_futures[future]
-
-                        # Submit a new task if there are remaining characters
-                        if remaining_chars:
-                            next_char, next_urls = remaining_chars.pop(0)
-                            self.logger.info(f"Starting next character: {next_char}")
-                            next_urls = [next_urls] if isinstance(next_urls, str) else next_urls
-
-                            if self.state.start_character(next_char):
-                                future = executor.submit(self._process_character_wrapper, next_char, next_urls,
-                                                         max_pages)
-                                active_futures[future] = next_char
-                                self.logger.info(f"Task submitted for {next_char}")
-                            else:
-                                self.logger.warning(f"Could not acquire lock for {next_char}")
-
-                self.logger.info("All characters processed")
-
-            finally:
-                self.logger.info("Shutting down executor")
-                executor.shutdown(wait=True)  # Changed to wait=True to ensure proper cleanup
-                self.logger.info("Executor shutdown complete")
-
-        except Exception as e:
-            self.logger.error(f"Error in process_urls: {str(e)}")
-            self.logger.exception("Error traceback:")
-            raise
-
-    def _process_character_wrapper(self, character: str, urls: List[str], max_pages: int) -> None:
-        """Wrapper for process_character with enhanced error handling"""
-        thread = threading.current_thread()
-        self.logger.info(f"Thread {thread.name} starting {character}")
-
-        try:
-            result = self.process_character(character, urls, max_pages)
-            self.logger.info(f"Thread {thread.name} completed {character}")
-            return result
-        except Exception as e:
-            self.logger.error(f"Thread {thread.name} error processing {character}: {str(e)}")
-            self.logger.exception("Error traceback:")
-            raise
-
-    def process_character(self, character: str, urls: List[str], max_pages: int = 380) -> None:
-        """Process a single character's URLs with enhanced error handling"""
-        thread = threading.current_thread()
-        self.logger.info(f"Thread {thread.name} processing {character}")
+    def _list_browser_page(self, task: PageTask) -> PageOutcome:
+        """List one search page with Selenium, resolving originals from the thumbnail data"""
+        character, page_num = task.character, task.page_num
+        browser = self._get_thread_browser()
+        current_url = f"{task.base_url}&pid={page_num * 42}" if page_num > 0 else task.base_url
+        self.logger.info(f"Processing page {page_num + 1} for {character}: {current_url}")
 
         try:
-            browser = self._get_thread_browser()
-            self.logger.info(f"Browser acquired for {character}")
-
-            for url_index, base_url in enumerate(urls, 1):
-                self.logger.info(f"Processing URL {url_index}/{len(urls)} for {character}: {base_url}")
+            if not self._safe_navigate(current_url):
+                self.logger.error(f"Navigation failed for {character} on page {page_num + 1}")
+                return PageOutcome.MORE if page_num > 0 else PageOutcome.URL_DONE
 
+            # Wait for thumbnail container
+            self.logger.debug(f"Waiting for thumbnail container on {current_url}")
+            try:
+                WebDriverWait(browser, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.thumbnail-container"))
+                )
+                links = WebDriverWait(browser, 10).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.thumbnail-preview a"))
+                )
+            except Exception:
+                links = []
+
+            if not links:
+                if page_num == 0:
+                    self.logger.warning(f"No images found for {character} on initial page, skipping character")
+                    return PageOutcome.SKIP_CHARACTER
+                self.logger.info(f"No more images found for {character} after page {page_num}, moving to next URL")
+                return PageOutcome.URL_DONE
+
+            thumbnails = [thumb for thumb in browser.execute_script(GelbooruURLResolver.THUMBNAIL_SCRIPT)
+                          if thumb.get('href')]
+            self.logger.info(f"Found {len(thumbnails)} images for {character} on page {page_num + 1}")
+
+            # Process each image
+            for img_index, thumbnail in enumerate(thumbnails, 1):
+                img_url = thumbnail['href']
                 try:
-                    # Check first page for images before processing
-                    if not self._safe_navigate(base_url):
-                        self.logger.error(f"Initial navigation failed for {character}")
+                    self.logger.debug(f"Processing image {img_index}/{len(thumbnails)} from {img_url}")
+                    if self.url_resolver.is_video(thumbnail):
+                        self.logger.debug(f"Skipping video post {img_url}")
                         continue
 
-                    # Wait for thumbnail container
-                    try:
-                        self.logger.debug(f"Checking for thumbnails on initial page for {character}")
-                        WebDriverWait(browser, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "div.thumbnail-container"))
-                        )
-
-                        # Find all image links on first page
-                        links = WebDriverWait(browser, 10).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.thumbnail-preview a"))
-                        )
-
-                        if not links:
-                            self.logger.warning(f"No images found for {character} on initial page, skipping character")
-                            return  # Skip to next character if no images found
-                    except Exception as e:
-                        self.logger.warning(f"No images found for {character}, skipping character: {str(e)}")
-                        return  # Skip to next character if no thumbnails found
-
-                    # Process pages only if initial check passed
-                    for page_num in range(max_pages):
-                        current_url = f"{base_url}&pid={page_num * 42}" if page_num > 0 else base_url
-                        self.logger.info(f"Processing page {page_num + 1} for {character}: {current_url}")
-
-                        try:
-                            if not self._safe_navigate(current_url):
-                                self.logger.error(f"Navigation failed for {character} on page {page_num + 1}")
-                                continue
-
-                            # Wait for thumbnail container
-                            self.logger.debug(f"Waiting for thumbnail container on {current_url}")
-                            try:
-                                WebDriverWait(browser, 10).until(
-                                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.thumbnail-container"))
-                                )
-                            except Exception as e:
-                                self.logger.info(
-                                    f"No more images found for {character} after page {page_num}, moving to next URL")
-                                break  # Break the page loop if no more thumbnails found
-
-                            # Find all image links
-                            links = WebDriverWait(browser, 10).until(
-                                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.thumbnail-preview a"))
-                            )
-
-                            if not links:
-                                self.logger.info(
-                                    f"No more images found for {character} after page {page_num}, moving to next URL")
-                                break  # Break the page loop if no more images found
-
-                            image_urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
-                            self.logger.info(f"Found {len(image_urls)} images for {character} on page {page_num + 1}")
-
-                            # Process each image
-                            for img_index, img_url in enumerate(image_urls, 1):
-                                try:
-                                    self.logger.debug(f"Processing image {img_index}/{len(image_urls)} from {img_url}")
-                                    full_image_url = self._expand_image(img_url)
-
-                                    if full_image_url:
-                                        if self._download_image(full_image_url, img_url):
-                                            self.logger.info(
-                                                f"Successfully downloaded image {img_index} for {character}")
-                                        else:
-                                            self.logger.warning(f"Failed to download image {img_index} for {character}")
-                                        time.sleep(self.config.download_delay)
-
-                                except Exception as e:
-                                    self.logger.error(f"Error processing image {img_url} for {character}: {str(e)}")
-                                    continue
-
-                            time.sleep(self.config.page_delay)
-
-                        except Exception as e:
-                            self.logger.error(f"Error processing page {page_num + 1} for {character}: {str(e)}")
-                            if "NewConnectionError" in str(e) or "ConnectionError" in str(e):
-                                self.logger.info(f"Connection error detected for {character}, moving to next character")
-                                return
-                            continue
+                    # Only open the post page when the list data is not enough
+                    full_image_url = self.url_resolver.resolve(thumbnail) or self._expand_image(img_url)
+
+                    if full_image_url:
+                        if self._submit_download(full_image_url, img_url, character=character):
+                            self.logger.debug(f"Handed off image {img_index} for {character}")
+                        else:
+                            self.logger.warning(f"Failed to download image {img_index} for {character}")
 
                 except Exception as e:
-                    self.logger.error(f"Error processing URL {base_url} for {character}: {str(e)}")
+                    self.logger.error(f"Error processing image {img_url} for {character}: {str(e)}")
                     continue
 
+            self._save_checkpoint(character, task.url_index, task.base_url, page_num)
+            return PageOutcome.MORE
+
         except Exception as e:
-            self.logger.error(f"Fatal error processing {character}: {str(e)}")
-            self.logger.exception("Error traceback:")
-            raise
-        finally:
-            try:
-                if hasattr(self.thread_local, 'browser'):
-                    self.logger.info(f"Cleaning up browser for {character}")
-                    self.thread_local.browser.quit()
-                    delattr(self.thread_local, 'browser')
-                    self.logger.info(f"Browser cleanup complete for {character}")
-            except Exception as e:
-                self.logger.error(f"Error cleaning up browser for {character}: {str(e)}")
+            self.logger.error(f"Error processing page {page_num + 1} for {character}: {str(e)}")
+            if "NewConnectionError" in str(e) or "ConnectionError" in str(e):
+                self.logger.info(f"Connection error detected for {character}, moving to next character")
+                return PageOutcome.SKIP_CHARACTER
+            return PageOutcome.MORE
 
 class ThreadedDanbooruScraper(HentaiScraper):
+    SITE_PROFILE = SiteProfile(
+        name='danbooru',
+        list_ready=PageReadiness(script="return document.readyState !== 'loading';"),
+        post_ready=PageReadiness(selector="img#image"),
+        original_url_marker='/original/'
+    )
+
     def __init__(self, config: ScraperConfig):
         # Initialize logger first
         logging.basicConfig(
@@ -2443,9 +5535,31 @@ class ThreadedDanbooruScraper(HentaiScraper):
         self.config = config
         self.thread_local = threading.local()
         self.state = ScraperState()
-        self.db_lock = threading.Lock()
+        self.pending_high_water: Dict[str, int] = {}
+        self.stop_requested = threading.Event()
         self.character_classifier = CharacterClassifier()
-        self.nsfw_detector = NSFWDetector(threshold=config.nsfw_threshold)
+        self.nsfw_detector = self._create_nsfw_detector()
+        self.rating_policy = RatingPolicy.from_config(config)
+        self.http = HTTPSessionPool(config, logger=self.logger)
+        self.api_client = DanbooruAPIClient(config, http=self.http, logger=self.logger)
+        self.download_engine = (AsyncDownloadEngine(config, self.http, self._finalize_download,
+                                                    on_failure=self._record_failure, screen=self._screen_preview,
+                                                    logger=self.logger)
+                                if config.async_downloads else None)
+        self.browser_pool = BrowserPool(
+            self._create_browser,
+            max_size=config.browser_pool_size,
+            max_navigations=config.browser_max_navigations,
+            max_rss_mb=config.browser_max_rss_mb,
+            logger=self.logger
+        )
+        self.wait_metrics = {
+            'navigate': LatencyHistogram('navigate'),
+            'page_ready': LatencyHistogram('page_ready'),
+            'image_expand': LatencyHistogram('image_expand'),
+            'dom_content_loaded': LatencyHistogram('dom_content_loaded')
+        }
+        self.page_cost = PageCostStats('dom_only' if self.dom_only else 'full')
 
         # Create base directories
         self.dirs = {
@@ -2472,32 +5586,13 @@ class ThreadedDanbooruScraper(HentaiScraper):
             # Initialize database
             self.db_path = self.dirs['metadata'] / 'downloads.db'
             conn = sqlite3.connect(str(self.db_path))
-            c = conn.cursor()
-
-            # Create necessary tables
-            c.executescript('''
-                CREATE TABLE IF NOT EXISTS downloads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT NOT NULL UNIQUE,
-                    filename TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    status TEXT,
-                    file_size INTEGER,
-                    md5_hash TEXT,
-                    source_page TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS failed_downloads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    error_message TEXT,
-                    attempts INTEGER DEFAULT 1
-                );
-            ''')
-
+            migrate_database(conn, self.logger)
             conn.commit()
             conn.close()
+            self._load_known_content()
+            self._load_checkpoints()
+            self._start_database_writer()
+            self._load_score_cache()
 
             # Create status file
             status_file = self.dirs['metadata'] / 'status.json'
@@ -2518,84 +5613,52 @@ class ThreadedDanbooruScraper(HentaiScraper):
             self.logger.error(f"Setup failed: {str(e)}")
             raise
 
-    def _get_thread_browser(self):
-        """Get or create thread-local browser instance"""
-        if not hasattr(self.thread_local, 'browser'):
-            try:
-                with self.state.browser_lock:
-                    self.logger.info(f"Creating new browser for thread {threading.current_thread().name}")
-
-                    options = webdriver.ChromeOptions()
-                    if self.config.headless:
-                        options.add_argument('--headless=new')
-
-                    # Add stability options
-                    options.add_argument('--no-sandbox')
-                    options.add_argument('--disable-dev-shm-usage')
-                    options.add_argument('--disable-gpu')
-                    options.add_argument('--disable-software-rasterizer')
-                    options.add_argument('--disable-extensions')
-                    options.add_argument('--start-maximized')
-                    options.add_argument(f'user-agent={self.config.user_agent}')
-                    options.add_argument('--disable-features=NetworkService')
-                    options.add_argument('--disable-features=VizDisplayCompositor')
-                    options.add_argument('--no-first-run')
-                    options.add_argument('--no-default-browser-check')
-                    options.add_argument('--disable-background-networking')
-                    options.add_argument('--disable-sync')
-                    options.add_argument('--disable-translate')
-                    options.add_argument('--hide-scrollbars')
-                    options.add_argument('--metrics-recording-only')
-                    options.add_argument('--mute-audio')
-                    options.add_argument('--safebrowsing-disable-auto-update')
-                    options.add_argument('--password-store=basic')
-
-                    service = webdriver.ChromeService()
-                    browser = webdriver.Chrome(service=service, options=options)
-
-                    # Set timeouts
-                    browser.set_page_load_timeout(30)
-                    browser.set_script_timeout(30)
-                    browser.implicitly_wait(10)
-
-                    self.thread_local.browser = browser
-
-            except Exception as e:
-                self.logger.error(f"Failed to create browser: {str(e)}")
-                raise
-
-        return self.thread_local.browser
-
-    def _safe_navigate(self, url: str, max_retries: int = 3) -> bool:
-        """Safely navigate to URL with retries"""
-        browser = self._get_thread_browser()
-
-        for attempt in range(max_retries):
-            try:
-                browser.get(url)
-                WebDriverWait(browser, self.config.request_timeout).until(
-                    lambda driver: driver.execute_script("return document.readyState") == "complete"
-                )
-                time.sleep(2)
-                return True
-
-            except Exception as e:
-                self.logger.warning(f"Navigation attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    return False
-
-                time.sleep(2 * (attempt + 1))
-
-                # Try refreshing browser on last attempt
-                if attempt == max_retries - 2:
-                    try:
-                        browser.quit()
-                        delattr(self.thread_local, 'browser')
-                        browser = self._get_thread_browser()
-                    except Exception as refresh_error:
-                        self.logger.error(f"Failed to refresh browser: {str(refresh_error)}")
+    def _create_browser(self) -> webdriver.Chrome:
+        """Launch a configured Chrome session for the browser pool"""
+        try:
+            self.logger.info(f"Creating new browser from thread {threading.current_thread().name}")
+
+            options = webdriver.ChromeOptions()
+            options.page_load_strategy = self.config.page_load_strategy
+            self._apply_dom_only_options(options)
+            if self.config.headless:
+                options.add_argument('--headless=new')
+
+            # Add stability options
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--disable-gpu')
+            options.add_argument('--disable-software-rasterizer')
+            options.add_argument('--disable-extensions')
+            options.add_argument('--start-maximized')
+            options.add_argument(f'user-agent={self.config.user_agent}')
+            options.add_argument('--disable-features=NetworkService')
+            options.add_argument('--disable-features=VizDisplayCompositor')
+            options.add_argument('--no-first-run')
+            options.add_argument('--no-default-browser-check')
+            options.add_argument('--disable-background-networking')
+            options.add_argument('--disable-sync')
+            options.add_argument('--disable-translate')
+            options.add_argument('--hide-scrollbars')
+            options.add_argument('--metrics-recording-only')
+            options.add_argument('--mute-audio')
+            options.add_argument('--safebrowsing-disable-auto-update')
+            options.add_argument('--password-store=basic')
+
+            service = webdriver.ChromeService()
+            browser = webdriver.Chrome(service=service, options=options)
+            self._apply_dom_only_blocking(browser)
+
+            # Set timeouts
+            browser.set_page_load_timeout(30)
+            browser.set_script_timeout(30)
+            browser.implicitly_wait(10)
+
+            return browser
 
-        return False
+        except Exception as e:
+            self.logger.error(f"Failed to create browser: {str(e)}")
+            raise
 
     def _extract_image_urls(self, browser: webdriver.Chrome) -> List[str]:
         """Extract image URLs from current page"""
@@ -2624,259 +5687,80 @@ class ThreadedDanbooruScraper(HentaiScraper):
             self.logger.error(f"Error extracting image URLs: {str(e)}")
             return []
 
-    def _download_image(self, url: str, source_page: str = None) -> bool:
-        """Download and save image with NSFW checking"""
-        try:
-            if not url:
-                self.logger.error("Invalid URL provided")
-                return False
-
-            # Get character path and setup paths
-            char_path = self._get_character_path(url, source_page)
-            filename = self._generate_filename(url)
-            temp_path = self.dirs['temp'] / f"temp_{filename}"
-            final_path = self.config.base_save_path / char_path / filename
-
-            # Create directories
-            temp_path.parent.mkdir(parents=True, exist_ok=True)
-            final_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Check existing file
-            if final_path.exists():
-                self.logger.info(f"File already exists: {final_path}")
-                return True
-
-            # Download with proper headers
-            headers = {
-                'User-Agent': self.config.user_agent,
-                'Accept': 'image/webp,image/apng,image/gif,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Referer': 'https://danbooru.donmai.us'
-            }
-
-            response = requests.get(url, stream=True, headers=headers, timeout=self.config.request_timeout)
-            response.raise_for_status()
-
-            # Save to temp file
-            with open(temp_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=self.config.chunk_size):
-                    if chunk:
-                        f.write(chunk)
-
-            # Verify file
-            if not temp_path.exists() or temp_path.stat().st_size == 0:
-                raise ValueError("Downloaded file is empty or missing")
-
-            # Check if valid image
-            try:
-                with Image.open(temp_path) as img:
-                    img.verify()
-                    is_gif = getattr(img, "is_animated", False)
-            except Exception as e:
-                self.logger.error(f"Invalid image file: {str(e)}")
-                temp_path.unlink()
-                return False
-
-            # Check NSFW content
-            is_nsfw, confidence = self.nsfw_detector.check_content(temp_path)
-
-            if is_nsfw:
-                # Calculate hash and move file
-                file_hash = self._get_file_hash(temp_path)
-                temp_path.rename(final_path)
-
-                # Record download
-                self._record_download(
-                    url=url,
-                    filename=filename,
-                    status='success',
-                    file_size=final_path.stat().st_size,
-                    md5_hash=file_hash,
-                    source_page=source_page
-                )
-
-                self.logger.info(f"Successfully downloaded NSFW content: {filename}")
-                return True
-            else:
-                self.logger.warning(f"Skipping SFW content (confidence: {confidence:.2f})")
-                temp_path.unlink()
-                return False
-
-        except Exception as e:
-            self.logger.error(f"Error downloading {url}: {str(e)}")
-            if 'temp_path' in locals() and temp_path.exists():
-                try:
-                    temp_path.unlink()
-                except Exception as cleanup_error:
-                    self.logger.error(f"Error cleaning up temp file: {str(cleanup_error)}")
-            return False
-
-    def process_urls(self, urls: Dict[str, str], max_pages: int = 380):
-        """Process URLs using thread pool"""
-        try:
-            self.logger.info(f"Starting scraping with 4 concurrent scrapers")
-            self.logger.info(f"Total characters to process: {len(urls)}")
-
-            # Create thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=4,
-                                                       thread_name_prefix="danbooru") as executor:
-                # Setup processing queues
-                remaining_chars = list(urls.items())
-                active_futures = {}
-                completed_count = 0
-
-                # Start initial characters
-                initial_chars = remaining_chars[:4]
-                remaining_chars = remaining_chars[4:]
-
-                for character, url_list in initial_chars:
-                    if self.state.start_character(character):
-                        url_list = [url_list] if isinstance(url_list, str) else url_list
-                        future = executor.submit(self._process_character_wrapper, character, url_list, max_pages)
-                        active_futures[future] = character
-
-                # Process results and add new tasks
-                while active_futures or remaining_chars:
-                    done, _ = concurrent.futures.wait(
-                        active_futures.keys(),
-                        timeout=None,
-                        return_when=concurrent.futures.FIRST_COMPLETED
-                    )
-
-                    for future in done:
-                        character = active_futures[future]
-                        try:
-                            future.result()
-                            completed_count += 1
-                            self.logger.info(f"Completed {character} ({completed_count}/{len(urls)})")
-                        except Exception as e:
-                            self.logger.error(f"Error processing {character}: {str(e)}")
-                        finally:
-                            self.state.complete_character(character)
-                            del active_futures[future]
-
-                        if remaining_chars:
-                            next_char, next_urls = remaining_chars.pop(0)
-                            if self.state.start_character(next_char):
-                                next_urls = [next_urls] if isinstance(next_urls, str) else next_urls
-                                future = executor.submit(self._process_character_wrapper, next_char, next_urls,
-                                                         max_pages)
-                                active_futures[future] = next_char
-
-        except Exception as e:
-            self.logger.error(f"Error in process_urls: {str(e)}")
-            raise
-
-    def _process_character_wrapper(self, character: str, urls: List[str], max_pages: int) -> None:
-        """Wrapper for process_character with error handling"""
-        thread = threading.current_thread()
-        self.logger.info(f"Thread {thread.name} starting {character}")
+    def _list_browser_page(self, task: PageTask) -> PageOutcome:
+        """List one search page with Selenium, reading original URLs from data-file-url"""
+        character, page_num = task.character, task.page_num
+        browser = self._get_thread_browser()
+        current_url = f"{task.base_url}&page={page_num + 1}" if page_num > 0 else task.base_url
+        self.logger.info(f"Processing page {page_num + 1} for {character}: {current_url}")
 
         try:
-            result = self.process_character(character, urls, max_pages)
-            self.logger.info(f"Thread {thread.name} completed {character}")
-            return result
-        except Exception as e:
-            self.logger.error(f"Thread {thread.name} error processing {character}: {str(e)}")
-            raise
-
-    def process_character(self, character: str, urls: List[str], max_pages: int = 380) -> None:
-        """Process a single character's URLs with enhanced error handling"""
-        thread = threading.current_thread()
-        self.logger.info(f"Thread {thread.name} processing {character}")
+            if not self._safe_navigate(current_url):
+                self.logger.error(f"Navigation failed for {character} on page {page_num + 1}")
+                return PageOutcome.MORE
 
-        try:
-            browser = self._get_thread_browser()
-            self.logger.info(f"Browser acquired for {character}")
+            image_urls = self._extract_image_urls(browser)
+            if not image_urls:
+                self.logger.info(f"No more images found for {character} after page {page_num}, moving to next URL")
+                return PageOutcome.URL_DONE
 
-            for url_index, base_url in enumerate(urls, 1):
-                self.logger.info(f"Processing URL {url_index}/{len(urls)} for {character}: {base_url}")
+            self.logger.info(f"Found {len(image_urls)} images for {character} on page {page_num + 1}")
 
+            # Process each image
+            for img_index, img_url in enumerate(image_urls, 1):
                 try:
-                    for page_num in range(max_pages):
-                        current_url = f"{base_url}&pid={page_num * 42}" if page_num > 0 else base_url
-                        self.logger.info(f"Processing page {page_num + 1} for {character}: {current_url}")
-
-                        try:
-                            if not self._safe_navigate(current_url):
-                                self.logger.error(f"Navigation failed for {character} on page {page_num + 1}")
-                                continue
-
-                            # Wait for thumbnail container
-                            self.logger.debug(f"Waiting for thumbnail container on {current_url}")
-                            WebDriverWait(browser, 10).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "div.thumbnail-container"))
-                            )
-
-                            # Find all image links
-                            self.logger.debug(f"Finding image links on {current_url}")
-                            links = WebDriverWait(browser, 10).until(
-                                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.thumbnail-preview a"))
-                            )
-
-                            image_urls = [link.get_attribute('href') for link in links if link.get_attribute('href')]
-                            self.logger.info(f"Found {len(image_urls)} images for {character} on page {page_num + 1}")
-
-                            # Process each image
-                            for img_index, img_url in enumerate(image_urls, 1):
-                                try:
-                                    self.logger.debug(f"Processing image {img_index}/{len(image_urls)} from {img_url}")
-                                    full_image_url = self._expand_image(img_url)
-
-                                    if full_image_url:
-                                        if self._download_image(full_image_url, img_url):
-                                            self.logger.info(
-                                                f"Successfully downloaded image {img_index} for {character}")
-                                        else:
-                                            self.logger.warning(f"Failed to download image {img_index} for {character}")
-                                        time.sleep(self.config.download_delay)
-
-                                except Exception as e:
-                                    self.logger.error(f"Error processing image {img_url} for {character}: {str(e)}")
-                                    continue
-
-                            time.sleep(self.config.page_delay)
-
-                        except Exception as e:
-                            self.logger.error(f"Error processing page {page_num + 1} for {character}: {str(e)}")
-                            # Check if it's a connection error
-                            if "NewConnectionError" in str(e) or "ConnectionError" in str(e):
-                                self.logger.info(f"Connection error detected for {character}, moving to next character")
-                                return  # Exit the function entirely, moving to next character
-                            continue
+                    self.logger.debug(f"Processing image {img_index}/{len(image_urls)} from {img_url}")
+                    if self._submit_download(img_url, current_url, character=character):
+                        self.logger.debug(f"Handed off image {img_index} for {character}")
+                    else:
+                        self.logger.warning(f"Failed to download image {img_index} for {character}")
 
                 except Exception as e:
-                    self.logger.error(f"Error processing URL {base_url} for {character}: {str(e)}")
+                    self.logger.error(f"Error processing image {img_url} for {character}: {str(e)}")
                     continue
 
+            self._save_checkpoint(character, task.url_index, task.base_url, page_num)
+            return PageOutcome.MORE
+
         except Exception as e:
-            self.logger.error(f"Fatal error processing {character}: {str(e)}")
-            self.logger.exception("Error traceback:")
-            raise
-        finally:
-            try:
-                if hasattr(self.thread_local, 'browser'):
-                    self.logger.info(f"Cleaning up browser for {character}")
-                    self.thread_local.browser.quit()
-                    delattr(self.thread_local, 'browser')
-                    self.logger.info(f"Browser cleanup complete for {character}")
-            except Exception as e:
-                self.logger.error(f"Error cleaning up browser for {character}: {str(e)}")
+            self.logger.error(f"Error processing page {page_num + 1} for {character}: {str(e)}")
+            # Check if it's a connection error
+            if "NewConnectionError" in str(e) or "ConnectionError" in str(e):
+                self.logger.info(f"Connection error detected for {character}, moving to next character")
+                return PageOutcome.SKIP_CHARACTER
+            return PageOutcome.MORE
 
     def cleanup(self) -> None:
         """Cleanup resources"""
         self.logger.info("Starting cleanup...")
         try:
-            # Close thread-local browsers
-            if hasattr(self, 'thread_local'):
-                for thread_id, thread in threading._active.items():
-                    try:
-                        if hasattr(thread, '_thread_local'):
-                            browser = getattr(thread._thread_local, 'browser', None)
-                            if browser:
-                                browser.quit()
-                    except Exception as e:
-                        self.logger.error(f"Error cleaning up browser for thread {thread_id}: {str(e)}")
+            # Finish queued downloads before tearing anything else down
+            if getattr(self, 'download_engine', None) is not None:
+                self.download_engine.stop()
+            if getattr(self, 'db_writer', None) is not None:
+                self._flush_high_water_marks()
+            self._close_database_writer()
+            if hasattr(self, 'nsfw_detector'):
+                self.nsfw_detector.close()
+
+            if hasattr(self, 'wait_metrics'):
+                self._log_wait_metrics()
+
+            if hasattr(self, 'http'):
+                self.logger.info(f"HTTP connection reuse: {self.http.stats()}")
+                self.logger.info(f"Host rate limits: {self.http.rate_limiter.stats()}")
+                self.http.close()
+
+            self._close_known_content()
+            self._close_score_cache()
+
+            # Close pooled browsers
+            if hasattr(self, 'browser_pool'):
+                try:
+                    self.logger.info(f"Browser pool stats: {self.browser_pool.stats()}")
+                    self.browser_pool.close()
+                except Exception as e:
+                    self.logger.error(f"Error closing browser pool: {str(e)}")
 
             # Clean temporary files
             if hasattr(self, 'dirs') and 'temp' in self.dirs:
@@ -2903,14 +5787,6 @@ class ThreadedDanbooruScraper(HentaiScraper):
                     except Exception as e:
                         self.logger.error(f"Error updating status file: {str(e)}")
 
-            # Close database connections
-            if hasattr(self.thread_local, 'db_connection'):
-                try:
-                    self.thread_local.db_connection.close()
-                    delattr(self.thread_local, 'db_connection')
-                except Exception as e:
-                    self.logger.error(f"Error closing database connection: {str(e)}")
-
             self.logger.info("Cleanup completed successfully")
 
         except Exception as e:
@@ -2918,92 +5794,8 @@ class ThreadedDanbooruScraper(HentaiScraper):
             raise
 
 
-    def _init_database_connection(self):
-        """Initialize thread-local database connection"""
-        if not hasattr(self.thread_local, 'db_connection'):
-            try:
-                self.thread_local.db_connection = sqlite3.connect(
-                    str(self.db_path),
-                    timeout=30.0
-                )
-                with self.db_lock:
-                    self.thread_local.db_connection.execute('PRAGMA journal_mode=WAL')
-                    self.thread_local.db_connection.execute('PRAGMA busy_timeout=30000')
-                self.logger.debug(f"Created database connection for thread {threading.current_thread().name}")
-            except Exception as e:
-                self.logger.error(f"Failed to connect to database: {str(e)}")
-                raise
-
-        return self.thread_local.db_connection
-
-
-    def _record_download(self, url: str, filename: str, status: str, file_size: int = None,
-                         md5_hash: str = None, source_page: str = None):
-        """Record download in database"""
-        try:
-            conn = self._init_database_connection()
-
-            with self.db_lock:
-                c = conn.cursor()
-                try:
-                    c.execute('''
-                                    INSERT INTO downloads 
-                                    (url, filename, status, file_size, md5_hash, source_page)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                ''', (url, filename, status, file_size, md5_hash, source_page))
-
-                    conn.commit()
-                    self.logger.debug(f"Thread {threading.current_thread().name} recorded download: {filename}")
-                except sqlite3.IntegrityError:
-                    self.logger.warning(f"Duplicate download record for URL: {url}")
-                    conn.rollback()
-                except Exception as e:
-                    self.logger.error(f"Database error in record_download: {str(e)}")
-                    conn.rollback()
-                    raise
-                finally:
-                    c.close()
-
-        except Exception as e:
-            self.logger.error(f"Failed to record download: {str(e)}")
-
-
-    def _record_failure(self, url: str, error_message: str):
-        """Record failed download attempt"""
-        try:
-            conn = self._init_database_connection()
-
-            with self.db_lock:
-                c = conn.cursor()
-                try:
-                    c.execute('SELECT attempts FROM failed_downloads WHERE url = ?', (url,))
-                    result = c.fetchone()
-
-                    if result:
-                        c.execute('''
-                                        UPDATE failed_downloads 
-                                        SET attempts = attempts + 1,
-                                            error_message = ?,
-                                            timestamp = CURRENT_TIMESTAMP
-                                        WHERE url = ?
-                                    ''', (error_message, url))
-                    else:
-                        c.execute('''
-                                        INSERT INTO failed_downloads (url, error_message)
-                                        VALUES (?, ?)
-                                    ''', (url, error_message))
-
-                    conn.commit()
-                except Exception as e:
-                    self.logger.error(f"Database error in record_failure: {str(e)}")
-                    conn.rollback()
-                    raise
-                finally:
-                    c.close()
-
-        except Exception as e:
-            self.logger.error(f"Failed to record failure: {str(e)}")
-
+    def _download_referer(self, url: str, source_page: str = None) -> str:
+        return 'https://danbooru.donmai.us'
 
     def _get_character_path(self, url: str, source_page: str) -> Path:
         """Extract character path from URL and source page"""
@@ -14440,8 +17232,37 @@ class URLs:
 #             logging.error(f"Error during cleanup: {str(cleanup_error)}")
 
 
+def compare_backends_cli(image_dir: str, reference: str, candidate: str) -> None:
+    """Print compare_inference_backends results for every image in image_dir"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+    image_paths = sorted(path for path in Path(image_dir).iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS)
+    logger.info(f"Comparing {candidate} against {reference} on {len(image_paths)} images")
+
+    results = compare_inference_backends(inference_backend_from_choice(reference, logger=logger),
+                                         inference_backend_from_choice(candidate, logger=logger), image_paths)
+    for key, value in results.items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+
 def main():
     """Main entry point for the scraper"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--resume', action='store_true',
+                        help="continue each character from the page an interrupted run stopped on")
+    parser.add_argument('--inference-processes', type=int, default=0,
+                        help="run NSFW detection in this many worker processes instead of in-process")
+    parser.add_argument('--compare-backends', metavar='IMAGE_DIR',
+                        help="score the images in IMAGE_DIR with two inference backends, print score parity "
+                             "and throughput, and exit without scraping")
+    parser.add_argument('--reference-backend', choices=INFERENCE_BACKEND_CHOICES, default='keras')
+    parser.add_argument('--candidate-backend', choices=INFERENCE_BACKEND_CHOICES, default='onnx')
+    args = parser.parse_args()
+
+    if args.compare_backends:
+        compare_backends_cli(args.compare_backends, args.reference_backend, args.candidate_backend)
+        return
+
     # Setup logging
     logging.basicConfig(
         level=logging.INFO,
@@ -14452,6 +17273,7 @@ def main():
         ]
     )
     logger = logging.getLogger(__name__)
+    threaded_gelbooru_scraper = None
 
     try:
         # Setup configuration
@@ -14464,6 +17286,8 @@ def main():
             filename_length=6,
             headless=False,
             nsfw_threshold=0.5,
+            resume=args.resume,
+            inference_processes=args.inference_processes,
         )
 
         logger.info(f"Starting scraper with config: {config}")
@@ -15008,12 +17832,18 @@ def main():
         # threaded_gelbooru_scraper.process_urls(urls, max_pages=380, max_workers=4)
 
     except KeyboardInterrupt:
-        logger.info("Scraping interrupted by user")
+        logger.info("Scraping interrupted by user, rerun with --resume to continue")
+        if threaded_gelbooru_scraper is not None:
+            # Stop listing before cleanup drains the download queue
+            threaded_gelbooru_scraper.stop()
 
     except Exception as e:
         logger.error(f"Scraping failed: {str(e)}")
         raise
     finally:
+        # Commits queued database writes, including the latest checkpoints
+        if threaded_gelbooru_scraper is not None:
+            threaded_gelbooru_scraper.cleanup()
         logger.info("Scraping completed")
 
 